@@ -29,4 +29,4 @@ GAME_PARAMETERS = {"size_x": 5,
                    "max_n_moves": 20,
                    "min_to_win": 4,
                    "not_allowed_move_prize": -100,
-                   "To_read_tables": "tables_5_4_4_trained_0.75_0.75_0.3.json"}
+                   "To_read_tables": "tables_5_4_4_trained_0.75_0.75_0.3.tables"}
@@ -4,9 +4,8 @@ import const
 import main
 import time
 import endingView
-from MUM.gameSystem import is_ending_state, return_first_state
-from MUM.stateSystem import available_moves
-from MUM.aiSystem import generate_board
+from MUM.gameSystem import return_first_state, play_move_model
+from MUM.stateSystem import legal_moves, table_move, play_table_move, table_board
 from typing import Dict, Optional, List
 
 
@@ -63,6 +62,8 @@ class GameView(arcade.View):
             self.state = test_list[test_counter]
         else:
             self.state = return_first_state(self.tables, self.game_parameters)
+        # tables with 'Flips' may keep the mirror of the map shown on the screen
+        self.flipped = False
         self.coins = arcade.SpriteList()
         self.time = None
         self.pause = False
@@ -128,7 +129,8 @@ class GameView(arcade.View):
         if not self.pause:
             if self.blocked:
                 move = self.play_move_model()
-                self.state = self.tables['States'][self.which_player - 1][self.state][move]
+                self.state, self.flipped = play_table_move(self.tables, self.which_player, self.state, self.flipped,
+                                                           move, self.game_parameters)
                 self.number_of_moves += 1
                 self.which_player = (self.which_player % 2) + 1
                 self.time = time.time()
@@ -137,8 +139,7 @@ class GameView(arcade.View):
             if time.time() - self.time > 0.75:
                 self.set_new_map()
                 if not self.move_ending_state:
-                    if is_ending_state(self.tables['Prizes'][self.which_player - 1][self.state],
-                                       self.game_parameters) or \
+                    if self.tables['Terminals'][self.which_player - 1][self.state] or \
                             self.number_of_moves == self.game_parameters['max_n_moves']:
                         self.move_ending_state = True
                         self.time = time.time()
@@ -167,9 +168,8 @@ class GameView(arcade.View):
             menu.setup()
             self.window.show_view(menu)
         if not self.blocked:
-            moves = available_moves(generate_board(self.tables['Boards'][self.which_player - 1][self.state],
-                                                   self.game_parameters),
-                                    self.game_parameters['size_y'], self.game_parameters['size_x'])
+            moves = [table_move(move, self.flipped, self.game_parameters)
+                     for move in legal_moves(self.tables, self.which_player, self.state, self.game_parameters)]
             played_move = None
             if symbol == arcade.key.KEY_1:
                 if 0 in moves:
@@ -191,21 +191,14 @@ class GameView(arcade.View):
                 self.blocked = True
                 self.time = time.time()
                 self.pause = True
-                self.state = self.tables['States'][self.which_player - 1][self.state][played_move]
+                self.state, self.flipped = play_table_move(self.tables, self.which_player, self.state, self.flipped,
+                                                           played_move, self.game_parameters)
                 self.number_of_moves += 1
                 self.which_player = (self.which_player % 2) + 1
 
     def play_move_model(self) -> int:
-        moves = available_moves(generate_board(self.tables['Boards'][self.which_player - 1][self.state],
-                                               self.game_parameters), self.game_parameters['size_y'],
-                                self.game_parameters['size_x'])
-        action = moves[0]
-        max_value = self.tables['Q-Tables'][self.which_player - 1][self.state][action]
-        for i in range(0, self.game_parameters['size_x']):
-            if self.tables['Q-Tables'][self.which_player - 1][self.state][i] > max_value and \
-                    self.tables['States'][self.which_player - 1][self.state][i] != - 1:
-                max_value = self.tables['Q-Tables'][self.which_player - 1][self.state][i]
-                action = i
+        action = table_move(play_move_model(self.tables, self.which_player, self.state, self.game_parameters),
+                            self.flipped, self.game_parameters)
         print("MOVE MADE BY AI " + str(action))
 
         return action
@@ -220,7 +213,7 @@ class GameView(arcade.View):
     def put_new_coin(self, pos_x: int, pos_y: int):
         x = pos_x
         y = self.game_parameters['size_y'] - pos_y - 1
-        player = self.tables['Boards'][self.which_player - 1][self.state]
+        player = table_board(self.tables, self.which_player, self.state, self.flipped)
         player = player[y][x]
         if player != 0:
             self.coins.append(Coin(player, 50, x, y, self.model_first))
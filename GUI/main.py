@@ -2,7 +2,7 @@ import arcade
 import arcade.gui
 import game
 import const
-from MUM.stateSystem import read_tables
+from MUM.stateSystem import read_tables, add_ending_flags
 from typing import Dict, Optional, List
 
 
@@ -74,7 +74,11 @@ class MenuView(arcade.View):
 
 def main():
     window = arcade.Window(const.SCREEN_WIDTH, const.SCREEN_HEIGHT, const.SCREEN_TITLE)
-    menu_view = MenuView(read_tables(const.GAME_PARAMETERS['To_read_tables']))
+    tables = read_tables(const.GAME_PARAMETERS['To_read_tables'],
+                         columns=["States", "Q-Tables", "Prizes", "Boards", "Legal-Moves",
+                                  "Terminals", "Winners", "Draws", "Flips"], mmap_mode="r")
+    add_ending_flags(tables, const.GAME_PARAMETERS)
+    menu_view = MenuView(tables)
     menu_view.setup()
     window.show_view(menu_view)
     arcade.run()
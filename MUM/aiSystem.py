@@ -1,9 +1,8 @@
 import numpy as np
-import copy
 import math
 from typing import Dict, Tuple
 from MUM.rewardSystem import is_the_winner, is_between_borders
-from MUM.stateSystem import available_moves
+from MUM.boardSystem import GameBoard
 
 MIN = -1
 MAX = 1
@@ -38,7 +37,7 @@ def alpha_beta(game_board: np.ndarray, depth: int, min_or_max: int, move: int,
                number_of_moves: int, actual_player: int, game_parameters: Dict) -> Tuple:
     """
     function for more intelligent agent, which plays against model, based on alpha-beta algorithm, which
-    uses heuristic functions in order to make agent smarter
+    uses heuristic functions in order to make agent smarter - game_board and played_moves are not modified
     :param game_board: map of game size_x x size_y
     :param depth: how many possible moves to analyze
     :param min_or_max: start as MAX (1)
@@ -52,50 +51,71 @@ def alpha_beta(game_board: np.ndarray, depth: int, min_or_max: int, move: int,
     :param game_parameters: parameters of the game
     :return: which move is going to be the best and how valuable it is
     """
+    board = GameBoard(game_board.copy(), played_moves.copy())
+    return alpha_beta_in_place(board, depth, min_or_max, move, alfa, beta, which_player,
+                               number_of_moves, actual_player, game_parameters)
+
+
+def alpha_beta_in_place(board: GameBoard, depth: int, min_or_max: int, move: int,
+                        alfa: float, beta: float, which_player: int, number_of_moves: int,
+                        actual_player: int, game_parameters: Dict) -> Tuple:
+    """
+    alpha-beta search, which plays and takes back moves on one map, instead of copying it for every child
+    :param board: map of the game with heights of columns, it is the same after the search
+    :param depth: how many possible moves to analyze
+    :param min_or_max: start as MAX (1)
+    :param move: played move
+    :param alfa: alpha-beta parameter - start as -math.inf
+    :param beta: alpha-beta parameter - start as math.inf
+    :param which_player: who is going to move - use 1 or 2
+    :param number_of_moves: how many moves played
+    :param actual_player: who is choosing move
+    :param game_parameters: parameters of the game
+    :return: which move is going to be the best and how valuable it is
+    """
     alfa_v = alfa
     beta_v = beta
-    if number_of_moves != 0:
-        current_prize = return_prize({'pos_x': move, 'pos_y': played_moves[1][move] - 1},
-                                     (which_player % 2) + 1, game_board,
-                                     number_of_moves, game_parameters)
-        if (which_player % 2) + 1 != actual_player:
-            current_prize *= -1
-    else:
-        current_prize = 0
-
+    game_board = board.board
+    played_moves = board.played_moves
     if map_full(played_moves, game_parameters) or depth == 0:
+        if number_of_moves != 0:
+            current_prize = return_prize({'pos_x': move, 'pos_y': played_moves[1][move] - 1},
+                                         (which_player % 2) + 1, game_board,
+                                         number_of_moves, game_parameters)
+            if (which_player % 2) + 1 != actual_player:
+                current_prize *= -1
+        else:
+            current_prize = 0
         return move, current_prize
 
     best_score = INFINITY_NEGATIVE * min_or_max
     best_max_move = -1
-    moves = available_moves(played_moves, game_parameters['size_y'], game_parameters['size_x'])
+    moves = board.available_moves()
 
     if which_player == 1:
         random_play = game_parameters['random_plays1']
     else:
         random_play = game_parameters['random_plays2']
 
-    heuristic_values = np.zeros(moves.size, dtype=int)
+    heuristic_values = [0 for i in range(0, len(moves))]
     if int(number_of_moves / 2) >= random_play:
-        for i in range(0, moves.size):
+        for i in range(0, len(moves)):
             heuristic_values[i] = heuristic_function(game_board, played_moves, which_player,
                                                      moves[i], number_of_moves, game_parameters)
-        for i in range(0, moves.size):
-            for j in range(i, moves.size):
+        for i in range(0, len(moves)):
+            for j in range(i, len(moves)):
                 if heuristic_values[i] < heuristic_values[j]:
                     heuristic_values[i], heuristic_values[j] = heuristic_values[j], heuristic_values[i]
                     moves[i], moves[j] = moves[j], moves[i]
     else:
         np.random.shuffle(moves)
 
-    for i in range(0, moves.size):
-        copy_of_map = copy.deepcopy(game_board)
-        copy_of_board = copy.deepcopy(played_moves)
-        play_move(copy_of_map, moves[i], which_player, game_parameters['size_y'])
-        copy_of_board[0][moves[i]] += 1
-        best = alpha_beta(copy_of_map, depth - 1, min_or_max * -1, moves[i], alfa_v, beta_v,
-                          (which_player % 2) + 1, copy_of_board, number_of_moves + 1,
-                          actual_player, game_parameters)
+    for i in range(0, len(moves)):
+        board.make_move(moves[i], which_player)
+        best = alpha_beta_in_place(board, depth - 1, min_or_max * -1, moves[i], alfa_v, beta_v,
+                                   (which_player % 2) + 1, number_of_moves + 1,
+                                   actual_player, game_parameters)
+        board.unmake_move(moves[i])
         score = best[1] + heuristic_values[i]
         if (min_or_max == MAX and score > best_score) or \
                 (min_or_max == MIN and score < best_score):
@@ -0,0 +1,160 @@
+import sys
+import time
+import random
+import numpy as np
+from typing import Callable, Dict, List, Tuple
+from MUM.aiSystem import generate_board, alpha_beta_in_place, MAX, INFINITY_NEGATIVE, INFINITY_POSITIVE
+from MUM.boardSystem import GameBoard
+from MUM.bitboardSystem import play_move_ai_bitboard, boards_to_bitboards, row_lengths_many
+from MUM.rewardSystem import row_lengths, counter_row_recursive
+from MUM.gameSystem import play_move_ai
+
+
+def prepare_positions(game_parameters: Dict, how_many: int, seed: int = 0) -> List[Tuple[np.ndarray, int, int]]:
+    """
+    random positions from the middle of the game, in which nobody has won yet
+    :param game_parameters: parameters of the game
+    :param how_many: how many positions to prepare
+    :param seed: seed of the random generator
+    :return: list of (map of the game, who is going to move, how many moves played)
+    """
+    generator = random.Random(seed)
+    positions = []
+    while len(positions) < how_many:
+        board = GameBoard.empty(game_parameters)
+        which_player = 1
+        for i in range(0, generator.randrange(0, game_parameters['size_x'] * game_parameters['size_y'] // 2)):
+            board.make_move(generator.choice(board.available_moves()), which_player)
+            which_player = (which_player % 2) + 1
+        positions.append((board.board, which_player, sum(board.heights)))
+    return positions
+
+
+def count_nodes(positions: List[Tuple[np.ndarray, int, int]], depth: int, game_parameters: Dict) -> int:
+    """
+    :param positions: positions prepared with prepare_positions
+    :param depth: depth of the search
+    :param game_parameters: parameters of the game
+    :return: how many moves were played by the search in all positions
+    """
+    nodes = 0
+    for game_board, which_player, number_of_moves in positions:
+        board = GameBoard(game_board.copy(), generate_board(game_board, game_parameters))
+        alpha_beta_in_place(board, depth, MAX, 0, INFINITY_NEGATIVE, INFINITY_POSITIVE, which_player,
+                            number_of_moves, which_player, game_parameters)
+        nodes += board.nodes
+    return nodes
+
+
+def time_search(search: Callable, positions: List[Tuple[np.ndarray, int, int]],
+                depth: int, game_parameters: Dict) -> float:
+    """
+    :param search: function with the signature of gameSystem.play_move_ai
+    :param positions: positions prepared with prepare_positions
+    :param depth: depth of the search
+    :param game_parameters: parameters of the game
+    :return: time of searching all positions in seconds
+    """
+    t0 = time.perf_counter()
+    for game_board, which_player, number_of_moves in positions:
+        search(game_board, depth, which_player, generate_board(game_board, game_parameters),
+               number_of_moves, which_player, game_parameters)
+    return time.perf_counter() - t0
+
+
+def benchmark_search(game_parameters: Dict, depth: int, how_many: int = 50, seed: int = 0) -> Dict:
+    """
+    nodes per second of both search engines in the same positions - both of them search the same tree
+    :param game_parameters: parameters of the game
+    :param depth: depth of the search
+    :param how_many: how many positions to search
+    :param seed: seed of the random generator
+    :return: number of nodes and nodes per second of every engine
+    """
+    positions = prepare_positions(game_parameters, how_many, seed)
+    np.random.seed(seed)
+    nodes = count_nodes(positions, depth, game_parameters)
+    engines = {"numpy": lambda *args: play_move_ai(*args[:-1], dict(args[-1], search_engine="numpy")),
+               "bitboard": play_move_ai_bitboard}
+    results = {"nodes": nodes}
+    for name, search in engines.items():
+        np.random.seed(seed)
+        results[name] = nodes / time_search(search, positions, depth, game_parameters)
+    return results
+
+
+def prepare_moves(positions: List[Tuple[np.ndarray, int, int]],
+                  game_parameters: Dict) -> Tuple[np.ndarray, List[Dict], List[int]]:
+    """
+    :param positions: positions prepared with prepare_positions
+    :param game_parameters: parameters of the game
+    :return: maps after every available move in every position, new coins and players, who moved
+    """
+    boards = []
+    coins = []
+    players = []
+    for game_board, which_player, number_of_moves in positions:
+        heights = np.count_nonzero(game_board, axis=0)
+        for move in range(0, game_parameters['size_x']):
+            if heights[move] < game_parameters['size_y']:
+                board = game_board.copy()
+                board[heights[move]][move] = which_player
+                boards.append(board)
+                coins.append({"pos_x": move, "pos_y": int(heights[move])})
+                players.append(which_player)
+    return np.array(boards), coins, players
+
+
+def benchmark_rows(game_parameters: Dict, how_many: int = 200, seed: int = 0) -> Dict:
+    """
+    rows of both players in all directions through the new coin (everything, what rewardSystem.return_prize
+    counts) after every available move - counted with rewardSystem.counter_row_recursive,
+    rewardSystem.row_lengths and bitboardSystem.row_lengths_many (maps are converted to bitmasks before timing)
+    :param game_parameters: parameters of the game
+    :param how_many: how many positions to use
+    :param seed: seed of the random generator
+    :return: number of evaluated moves and moves per second of every version
+    """
+    boards, coins, players = prepare_moves(prepare_positions(game_parameters, how_many, seed), game_parameters)
+    results = {"moves": len(coins)}
+    t0 = time.perf_counter()
+    for i in range(0, len(coins)):
+        for which_player in (1, 2):
+            for type_of_row in range(1, 5):
+                counter_row_recursive(coins[i], which_player, boards[i], game_parameters, type_of_row)
+    results['recursive'] = len(coins) / (time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    for i in range(0, len(coins)):
+        for which_player in (1, 2):
+            row_lengths(coins[i], which_player, boards[i], game_parameters)
+    results['indexed'] = len(coins) / (time.perf_counter() - t0)
+    masks = boards_to_bitboards(boards, game_parameters)
+    pos_x = np.array([coin['pos_x'] for coin in coins])
+    pos_y = np.array([coin['pos_y'] for coin in coins])
+    t0 = time.perf_counter()
+    for mask in masks:
+        row_lengths_many(mask, pos_x, pos_y, game_parameters)
+    results['batched'] = len(coins) / (time.perf_counter() - t0)
+    return results
+
+
+def main() -> None:
+    """
+    python -m MUM.benchmarkSystem size_x size_y min_to_win depth
+    benchmarks search engines and counting rows for prizes
+    :return:
+    """
+    game_parameters = {"size_x": int(sys.argv[1]), "size_y": int(sys.argv[2]), "min_to_win": int(sys.argv[3]),
+                       "random_plays1": 0, "random_plays2": 0}
+    results = benchmark_search(game_parameters, int(sys.argv[4]))
+    print("Nodes: " + str(results['nodes']))
+    for name in ("numpy", "bitboard"):
+        print(name + ": " + str(round(results[name])) + " nodes/second")
+    results = benchmark_rows(game_parameters)
+    print("Moves: " + str(results['moves']))
+    for name in ("recursive", "indexed", "batched"):
+        print(name + ": " + str(round(results[name])) + " moves/second")
+
+
+if __name__ == '__main__':
+    main()
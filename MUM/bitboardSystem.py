@@ -0,0 +1,410 @@
+import numpy as np
+import math
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+MIN = -1
+MAX = 1
+INFINITY_POSITIVE = math.inf
+INFINITY_NEGATIVE = -math.inf
+WIN_PRIZE = 10
+HEURISTIC_NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (1, -1), (1, 0), (1, 1), (0, -1)]
+ROW_DIRECTIONS = [(1, 0), (0, 1), (1, -1), (1, 1)]
+# directions of rewardSystem.counter_row for type_of_row 1 - 4, vertical rows are only counted downwards
+ROW_TYPES = [(1, 0), (0, -1), (1, -1), (1, 1)]
+
+
+def bit_index(x: int, y: int, size_y: int) -> int:
+    """
+    every column takes size_y + 1 bits, the additional bit is always empty,
+    so shifted masks never wrap from one column to the next one
+    :param x: x_cord
+    :param y: y_cord, 0 is the bottom row
+    :param size_y: vertical size of the map
+    :return: index of bit, which represents the field
+    """
+    return x * (size_y + 1) + y
+
+
+def board_to_bitboards(game_board: np.ndarray, game_parameters: Dict) -> Tuple[int, int]:
+    """
+    converts map of the game to bitmasks of both players
+    :param game_board: map of game size_x x size_y
+    :param game_parameters: parameters of the game
+    :return: bitmask of the first and the second player
+    """
+    masks = [0, 0, 0]
+    for y in range(0, game_parameters['size_y']):
+        for x in range(0, game_parameters['size_x']):
+            masks[int(game_board[y][x])] |= 1 << bit_index(x, y, game_parameters['size_y'])
+    return masks[1], masks[2]
+
+
+def position_key(mask_1: int, mask_2: int) -> int:
+    """
+    unique key of the position - in every column all taken fields are added to coins of the first player,
+    so the height of the column is kept by the highest bit and keys do not depend on hash() salting
+    :param mask_1: bitmask of the first player
+    :param mask_2: bitmask of the second player
+    :return: key of the position
+    """
+    return mask_1 + (mask_1 | mask_2)
+
+
+@lru_cache(maxsize=None)
+def winning_windows(x: int, y: int, size_x: int, size_y: int, min_to_win: int) -> Tuple[int, ...]:
+    """
+    all rows of min_to_win fields going through (x, y), without the (x, y) field itself - it works like
+    rewardSystem.counter_row, so (x, y) may lie outside the map and vertical rows are only counted downwards
+    :param x: x_cord
+    :param y: y_cord
+    :param size_x: horizontal size of the map
+    :param size_y: vertical size of the map
+    :param min_to_win: how many coins in a row are needed to win
+    :return: bitmasks, which have to be fully covered by coins of the player
+    """
+    windows = []
+    for x_mod, y_mod in ROW_DIRECTIONS:
+        if x_mod == 0:
+            offsets = [-(min_to_win - 1)]
+        else:
+            offsets = range(-(min_to_win - 1), 1)
+        for offset in offsets:
+            window = 0
+            for i in range(offset, offset + min_to_win):
+                if i == 0:
+                    continue
+                pos_x = x + i * x_mod
+                pos_y = y + i * y_mod
+                if not (size_x > pos_x >= 0 and size_y > pos_y >= 0):
+                    window = -1
+                    break
+                window |= 1 << bit_index(pos_x, pos_y, size_y)
+            if window >= 0:
+                windows.append(window)
+    return tuple(windows)
+
+
+@lru_cache(maxsize=None)
+def row_rays(x: int, y: int, size_x: int, size_y: int, min_to_win: int) -> Tuple:
+    """
+    fields visited by rewardSystem.counter_row from (x, y) - for every type of row, for every side,
+    fields (y, x) from the neighbour of (x, y) to the border of the map, at most min_to_win of them,
+    (x, y) itself may lie outside the map
+    :param x: x_cord
+    :param y: y_cord
+    :param size_x: horizontal size of the map
+    :param size_y: vertical size of the map
+    :param min_to_win: how many coins in a row are needed to win
+    :return: rays for every type of row
+    """
+    rays = []
+    for x_mod, y_mod in ROW_TYPES:
+        sides = []
+        for side in ((1,) if x_mod == 0 else (1, -1)):
+            ray = []
+            pos_x = x + side * x_mod
+            pos_y = y + side * y_mod
+            while len(ray) < min_to_win and size_x > pos_x >= 0 and size_y > pos_y >= 0:
+                ray.append((pos_y, pos_x))
+                pos_x += side * x_mod
+                pos_y += side * y_mod
+            sides.append(tuple(ray))
+        rays.append(tuple(sides))
+    return tuple(rays)
+
+
+@lru_cache(maxsize=None)
+def prepare_row_masks(size_x: int, size_y: int, min_to_win: int) -> np.ndarray:
+    """
+    row_rays of every field of the map as bitmasks - for every side of a row the i-th mask contains
+    the first i + 1 fields of the ray, so the length of coins in a row is the number of covered masks,
+    masks of missing fields contain the empty bit above the first column, which is never taken
+    :param size_x: horizontal size of the map
+    :param size_y: vertical size of the map
+    :param min_to_win: how many coins in a row are needed to win
+    :return: int64 array size_x * size_y x 4 x 2 x min_to_win, field (x, y) has index x * size_y + y
+    """
+    never_taken = 1 << bit_index(0, size_y, size_y)
+    masks = np.full((size_x * size_y, len(ROW_TYPES), 2, min_to_win), never_taken, dtype=np.int64)
+    for x in range(0, size_x):
+        for y in range(0, size_y):
+            for i, sides in enumerate(row_rays(x, y, size_x, size_y, min_to_win)):
+                for j, ray in enumerate(sides):
+                    mask = 0
+                    for k, (pos_y, pos_x) in enumerate(ray):
+                        mask |= 1 << bit_index(pos_x, pos_y, size_y)
+                        masks[x * size_y + y, i, j, k] = mask
+    return masks
+
+
+def row_lengths_many(masks: np.ndarray, pos_x: np.ndarray, pos_y: np.ndarray,
+                     game_parameters: Dict) -> np.ndarray:
+    """
+    rewardSystem.counter_row of every type for many maps at once
+    :param masks: int64 bitmasks of the counted player
+    :param pos_x: x_cord of the new coin on every map
+    :param pos_y: y_cord of the new coin on every map, inside the map
+    :param game_parameters: parameters of the game
+    :return: int array N x 4 - lengths of rows through the new coin including it
+    """
+    row_masks = prepare_row_masks(game_parameters['size_x'], game_parameters['size_y'],
+                                  game_parameters['min_to_win'])
+    row_masks = row_masks[np.asarray(pos_x) * game_parameters['size_y'] + np.asarray(pos_y)]
+    masks = np.asarray(masks, dtype=np.int64).reshape(-1)
+    lengths = np.ones((len(masks), len(ROW_TYPES)), dtype=np.int64)
+    # one prefix mask at a time keeps memory linear in N
+    for i in range(0, len(ROW_TYPES)):
+        for j in range(0, 2):
+            for k in range(0, game_parameters['min_to_win']):
+                lengths[:, i] += (masks & row_masks[:, i, j, k]) == row_masks[:, i, j, k]
+    return lengths
+
+
+@lru_cache(maxsize=None)
+def prepare_move_masks(size_x: int, size_y: int, min_to_win: int) -> Tuple[List, List]:
+    """
+    precomputes, for every column, masks used by aiSystem.return_prize and aiSystem.heuristic_function -
+    both of them look at the field (move, played_moves[1][move]), where played_moves[1][move] == move
+    :param size_x: horizontal size of the map
+    :param size_y: vertical size of the map
+    :param min_to_win: how many coins in a row are needed to win
+    :return: winning windows and neighbour masks for every column
+    """
+    windows = [winning_windows(move, move - 1, size_x, size_y, min_to_win) for move in range(0, size_x)]
+    neighbours = []
+    for move in range(0, size_x):
+        mask = 0
+        for x_mod, y_mod in HEURISTIC_NEIGHBOURS:
+            if size_x > move + x_mod >= 0 and size_y > move + y_mod >= 0:
+                mask |= 1 << bit_index(move + x_mod, move + y_mod, size_y)
+        neighbours.append(mask)
+    return windows, neighbours
+
+
+def count_bits(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def is_random_node(which_player: int, number_of_moves: int, game_parameters: Dict) -> bool:
+    """
+    :param which_player: who is going to move - use 1 or 2
+    :param number_of_moves: how many moves played
+    :param game_parameters: parameters of the game
+    :return: are moves of this node shuffled instead of sorted by heuristic function
+    """
+    if which_player == 1:
+        random_play = game_parameters['random_plays1']
+    else:
+        random_play = game_parameters['random_plays2']
+    return int(number_of_moves / 2) < random_play
+
+
+def leaf_prize(masks: List[int], move: int, which_player: int, number_of_moves: int,
+               actual_player: int, game_parameters: Dict) -> int:
+    """
+    prize of the last move, the same as aiSystem.return_prize with the sign used by aiSystem.alpha_beta
+    :param masks: [unused, bitmask of the first player, bitmask of the second player]
+    :param move: played move
+    :param which_player: who is going to move - use 1 or 2
+    :param number_of_moves: how many moves played
+    :param actual_player: who is choosing move
+    :param game_parameters: parameters of the game
+    :return: prize for played move
+    """
+    windows = prepare_move_masks(game_parameters['size_x'], game_parameters['size_y'],
+                                 game_parameters['min_to_win'])[0]
+    moved = (which_player % 2) + 1
+    current_prize = 0
+    if number_of_moves >= game_parameters['min_to_win'] * 2 - 1:
+        player_mask = masks[moved]
+        for window in windows[move]:
+            if player_mask & window == window:
+                current_prize = WIN_PRIZE
+                break
+    if moved != actual_player:
+        current_prize *= -1
+    return current_prize
+
+
+def order_moves(masks: List[int], heights: List[int], which_player: int,
+                number_of_moves: int, game_parameters: Dict) -> Tuple[List[int], List[int]]:
+    """
+    available moves in order, in which they are searched - sorted by aiSystem.heuristic_function
+    or shuffled during first random_plays moves
+    :param masks: [unused, bitmask of the first player, bitmask of the second player]
+    :param heights: how many coins are in every column
+    :param which_player: who is going to move - use 1 or 2
+    :param number_of_moves: how many moves played
+    :param game_parameters: parameters of the game
+    :return: moves and additional prizes for them
+    """
+    size_y = game_parameters['size_y']
+    neighbours = prepare_move_masks(game_parameters['size_x'], size_y, game_parameters['min_to_win'])[1]
+    moves = [i for i in range(0, game_parameters['size_x']) if heights[i] != size_y]
+    heuristic_values = [0 for i in range(0, len(moves))]
+    if not is_random_node(which_player, number_of_moves, game_parameters):
+        own = masks[which_player]
+        enemy = masks[(which_player % 2) + 1]
+        empty_penalty = number_of_moves > 7
+        for i in range(0, len(moves)):
+            neighbour = neighbours[moves[i]]
+            heuristic_values[i] = 2 * count_bits(own & neighbour) + count_bits(enemy & neighbour)
+            if empty_penalty:
+                heuristic_values[i] -= count_bits(neighbour & ~(own | enemy))
+        for i in range(0, len(moves)):
+            for j in range(i, len(moves)):
+                if heuristic_values[i] < heuristic_values[j]:
+                    heuristic_values[i], heuristic_values[j] = heuristic_values[j], heuristic_values[i]
+                    moves[i], moves[j] = moves[j], moves[i]
+    else:
+        # np.random is used, so the random games stay the same as in aiSystem.alpha_beta
+        np.random.shuffle(moves)
+    return moves, heuristic_values
+
+
+def alpha_beta_bitboard(masks: List[int], heights: List[int], depth: int, min_or_max: int, move: int,
+                        alfa: float, beta: float, which_player: int, number_of_moves: int,
+                        actual_player: int, game_parameters: Dict) -> Tuple:
+    """
+    the same search as aiSystem.alpha_beta, but the map is kept as one bitmask per player and
+    moves are made and taken back on masks and heights in place
+    :param masks: [unused, bitmask of the first player, bitmask of the second player]
+    :param heights: how many coins are in every column
+    :param depth: how many possible moves to analyze
+    :param min_or_max: start as MAX (1)
+    :param move: played move
+    :param alfa: alpha-beta parameter - start as -math.inf
+    :param beta: alpha-beta parameter - start as math.inf
+    :param which_player: who is going to move - use 1 or 2
+    :param number_of_moves: how many moves played
+    :param actual_player: who is choosing move
+    :param game_parameters: parameters of the game
+    :return: which move is going to be the best and how valuable it is
+    """
+    size_y = game_parameters['size_y']
+    opponent = (which_player % 2) + 1
+
+    # aiSystem.map_full never reports a full map, so only depth ends the search
+    if depth == 0:
+        return move, leaf_prize(masks, move, which_player, number_of_moves, actual_player, game_parameters)
+
+    best_score = INFINITY_NEGATIVE * min_or_max
+    best_max_move = -1
+    moves, heuristic_values = order_moves(masks, heights, which_player, number_of_moves, game_parameters)
+
+    alfa_v = alfa
+    beta_v = beta
+    for i in range(0, len(moves)):
+        coin = 1 << bit_index(moves[i], heights[moves[i]], size_y)
+        masks[which_player] |= coin
+        heights[moves[i]] += 1
+        best = alpha_beta_bitboard(masks, heights, depth - 1, min_or_max * -1, moves[i], alfa_v, beta_v,
+                                   opponent, number_of_moves + 1, actual_player, game_parameters)
+        heights[moves[i]] -= 1
+        masks[which_player] ^= coin
+        score = best[1] + heuristic_values[i]
+        if (min_or_max == MAX and score > best_score) or \
+                (min_or_max == MIN and score < best_score):
+            best_score = score
+            best_max_move = best[0]
+        if min_or_max == MAX:
+            if score >= beta:
+                break
+            alfa_v = max(alfa, score)
+        else:
+            if score <= alfa:
+                break
+            beta_v = min(beta, score)
+
+    return best_max_move, best_score
+
+
+def play_move_ai_bitboard(game_board: np.ndarray, depth: int, which_player: int, played_moves: np.ndarray,
+                          number_of_moves: int, actual_player: int, game_parameters: Dict) -> int:
+    """
+    function for playing as AI, replacement for gameSystem.play_move_ai, which returns the same moves
+    :param game_board: map of game size_x x size_y
+    :param depth: how many possible moves to analyze
+    :param which_player: who is going to move - use 1 or 2
+    :param played_moves: numpy array generated with generate_board
+    :param number_of_moves: how many moves played
+    :param actual_player: who is choosing move
+    :param game_parameters: parameters of the game
+    :return: which move is going to be the best
+    """
+    mask_1, mask_2 = board_to_bitboards(game_board, game_parameters)
+    heights = [int(played_moves[0][i]) for i in range(0, game_parameters['size_x'])]
+    move = alpha_beta_bitboard([0, mask_1, mask_2], heights, depth, MAX, 0, INFINITY_NEGATIVE,
+                               INFINITY_POSITIVE, which_player, number_of_moves, actual_player, game_parameters)
+    return move[0]
+
+
+def return_equal_moves(game_board: np.ndarray, depth: int, which_player: int, played_moves: np.ndarray,
+                       number_of_moves: int, actual_player: int, game_parameters: Dict) -> List[int]:
+    """
+    moves, which play_move_ai_bitboard may return, when moves of the first node are shuffled -
+    every move is searched with the full window and moves returned for the best score are collected
+    :param game_board: map of game size_x x size_y
+    :param depth: how many possible moves to analyze
+    :param which_player: who is going to move - use 1 or 2
+    :param played_moves: numpy array generated with generate_board
+    :param number_of_moves: how many moves played
+    :param actual_player: who is choosing move
+    :param game_parameters: parameters of the game
+    :return: sorted list of equally good moves
+    """
+    if depth == 0:
+        return [0]
+    mask_1, mask_2 = board_to_bitboards(game_board, game_parameters)
+    masks = [0, mask_1, mask_2]
+    heights = [int(played_moves[0][i]) for i in range(0, game_parameters['size_x'])]
+    moves, heuristic_values = order_moves(masks, heights, which_player, number_of_moves, game_parameters)
+    if len(moves) == 0:
+        return [-1]
+    results = []
+    for i in range(0, len(moves)):
+        coin = 1 << bit_index(moves[i], heights[moves[i]], game_parameters['size_y'])
+        masks[which_player] |= coin
+        heights[moves[i]] += 1
+        best = alpha_beta_bitboard(masks, heights, depth - 1, MIN, moves[i], INFINITY_NEGATIVE, INFINITY_POSITIVE,
+                                   (which_player % 2) + 1, number_of_moves + 1, actual_player, game_parameters)
+        heights[moves[i]] -= 1
+        masks[which_player] ^= coin
+        results.append((best[1] + heuristic_values[i], best[0]))
+    best_score = max(result[0] for result in results)
+    return sorted(set(result[1] for result in results if result[0] == best_score))
+
+
+def boards_to_bitboards(boards: np.ndarray, game_parameters: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    converts many maps of the game at once
+    :param boards: numpy array N x size_y x size_x
+    :param game_parameters: parameters of the game
+    :return: int64 bitmasks of the first and the second player
+    """
+    mask_1 = np.zeros(len(boards), dtype=np.int64)
+    mask_2 = np.zeros(len(boards), dtype=np.int64)
+    for y in range(0, game_parameters['size_y']):
+        for x in range(0, game_parameters['size_x']):
+            bit = np.int64(bit_index(x, y, game_parameters['size_y']))
+            mask_1 |= (boards[:, y, x] == 1).astype(np.int64) << bit
+            mask_2 |= (boards[:, y, x] == 2).astype(np.int64) << bit
+    return mask_1, mask_2
+
+
+def has_won_many(masks: np.ndarray, size_y: int, min_to_win: int) -> np.ndarray:
+    """
+    checks if there is any row of min_to_win coins on every bitmask
+    :param masks: bitmasks of one player
+    :param size_y: vertical size of the map
+    :param min_to_win: how many coins in a row are needed to win
+    :return: bool array - is there a winning row on every bitmask
+    """
+    won = np.zeros(masks.shape, dtype=bool)
+    for shift in (1, size_y + 1, size_y, size_y + 2):
+        row = masks.copy()
+        for i in range(1, min_to_win):
+            row &= masks >> np.int64(shift * i)
+        won |= row != 0
+    return won
@@ -0,0 +1,73 @@
+import numpy as np
+from typing import Dict, List
+from MUM.bitboardSystem import bit_index
+
+
+class GameBoard:
+    """
+    map of the game together with heights of its columns - moves are played and taken back in place,
+    so searching the game tree does not need copies of the map, key of the map (encodingSystem.encode_board)
+    is updated with every move
+    """
+    def __init__(self, game_board: np.ndarray, played_moves: np.ndarray):
+        """
+        :param game_board: map of game size_x x size_y, it is modified in place
+        :param played_moves: numpy array generated with aiSystem.generate_board, it is modified in place
+        """
+        self.board = game_board
+        self.played_moves = played_moves
+        self.heights = [int(height) for height in played_moves[0]]
+        self.size_y = game_board.shape[0]
+        self.nodes = 0
+        self.key = 0
+        for x in range(0, len(self.heights)):
+            for y in range(0, self.heights[x]):
+                self.key += self.key_step(x, y, int(game_board[y, x]))
+
+    @classmethod
+    def empty(cls, game_parameters: Dict) -> "GameBoard":
+        played_moves = np.zeros((2, game_parameters['size_x']), dtype=int)
+        played_moves[1] = np.arange(0, game_parameters['size_x'])
+        return cls(np.zeros((game_parameters['size_y'], game_parameters['size_x']), dtype=int), played_moves)
+
+    def available_moves(self) -> List[int]:
+        """
+        :return: columns, which are not full, in increasing order
+        """
+        return [i for i in range(0, len(self.heights)) if self.heights[i] != self.size_y]
+
+    def key_step(self, x: int, y: int, which_player: int) -> int:
+        """
+        coin of the first player is added to both bitmasks of the key, coin of the second player only to one
+        :param x: x_cord
+        :param y: y_cord
+        :param which_player: whose coin it is
+        :return: how the key changes, when the coin is added
+        """
+        return (3 - which_player) << bit_index(x, y, self.size_y)
+
+    def make_move(self, move: int, which_player: int) -> int:
+        """
+        :param move: column, in which coin is dropped
+        :param which_player: whose coin it is
+        :return: row of the new coin
+        """
+        pos_y = self.heights[move]
+        self.board[pos_y, move] = which_player
+        self.heights[move] = pos_y + 1
+        self.played_moves[0, move] = pos_y + 1
+        self.key += self.key_step(move, pos_y, which_player)
+        self.nodes += 1
+        return pos_y
+
+    def unmake_move(self, move: int) -> None:
+        """
+        takes back the last coin of the column
+        :param move: column of the coin
+        :return:
+        """
+        pos_y = self.heights[move] - 1
+        self.key -= self.key_step(move, pos_y, int(self.board[pos_y, move]))
+        self.board[pos_y, move] = 0
+        self.heights[move] = pos_y
+        self.played_moves[0, move] = pos_y
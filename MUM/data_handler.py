@@ -1,4 +1,6 @@
 import csv
+import os
+import sys
 from typing import List
 
 
@@ -11,3 +13,32 @@ def append_to_csv(file: str, data: List) -> None:
 def append_to_txt(file: str, text: str):
     with open(file, "a") as file:
         file.write(text)
+
+
+def reset_peak_memory() -> None:
+    """
+    starts measuring the peak memory of the process again - only on Linux, elsewhere the peak is counted
+    from the start of the process
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def return_peak_memory() -> float:
+    """
+    :return: peak resident memory of the process in MB since the last reset_peak_memory
+    """
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 1024)
@@ -0,0 +1,141 @@
+import numpy as np
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+from MUM.bitboardSystem import MAX, MIN, INFINITY_NEGATIVE, INFINITY_POSITIVE, bit_index, board_to_bitboards, \
+    leaf_prize, order_moves
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchBudget:
+    """
+    nodes visited by alpha_beta_budget, which raises SearchTimeout after node_limit nodes or after deadline
+    (time.perf_counter)
+    """
+    def __init__(self):
+        self.nodes = 0
+        self.node_limit = math.inf
+        self.deadline = math.inf
+        self.depth_reached = 0
+
+    def stats(self) -> Dict:
+        return {"nodes": self.nodes, "depth_reached": self.depth_reached}
+
+
+def alpha_beta_budget(masks: List[int], heights: List[int], depth: int, min_or_max: int, move: int,
+                      alfa: float, beta: float, which_player: int, number_of_moves: int,
+                      actual_player: int, game_parameters: Dict, budget: SearchBudget,
+                      first_move: int = -1) -> Tuple:
+    """
+    bitboardSystem.alpha_beta_bitboard, which counts nodes in the budget and can search first_move first
+    :param masks: [unused, bitmask of the first player, bitmask of the second player]
+    :param heights: how many coins are in every column
+    :param depth: how many possible moves to analyze
+    :param min_or_max: start as MAX (1)
+    :param move: played move
+    :param alfa: alpha-beta parameter - start as -math.inf
+    :param beta: alpha-beta parameter - start as math.inf
+    :param which_player: who is going to move - use 1 or 2
+    :param number_of_moves: how many moves played
+    :param actual_player: who is choosing move
+    :param game_parameters: parameters of the game
+    :param budget: budget of the search
+    :param first_move: column searched first
+    :return: which move is going to be the best, how valuable it is and the best column
+    """
+    budget.nodes += 1
+    if budget.nodes >= budget.node_limit or (budget.nodes % 256 == 0 and time.perf_counter() >= budget.deadline):
+        raise SearchTimeout()
+    if depth == 0:
+        return move, leaf_prize(masks, move, which_player, number_of_moves, actual_player, game_parameters), -1
+
+    moves, heuristic_values = order_moves(masks, heights, which_player, number_of_moves, game_parameters)
+    if first_move in moves and moves[0] != first_move:
+        index = moves.index(first_move)
+        moves.insert(0, moves.pop(index))
+        heuristic_values.insert(0, heuristic_values.pop(index))
+
+    size_y = game_parameters['size_y']
+    opponent = (which_player % 2) + 1
+    best_score = INFINITY_NEGATIVE * min_or_max
+    best_max_move = -1
+    best_column = -1
+    alfa_v = alfa
+    beta_v = beta
+    for i in range(0, len(moves)):
+        coin = 1 << bit_index(moves[i], heights[moves[i]], size_y)
+        masks[which_player] |= coin
+        heights[moves[i]] += 1
+        best = alpha_beta_budget(masks, heights, depth - 1, min_or_max * -1, moves[i], alfa_v, beta_v,
+                                 opponent, number_of_moves + 1, actual_player, game_parameters, budget)
+        heights[moves[i]] -= 1
+        masks[which_player] ^= coin
+        score = best[1] + heuristic_values[i]
+        if (min_or_max == MAX and score > best_score) or \
+                (min_or_max == MIN and score < best_score):
+            best_score = score
+            best_max_move = best[0]
+            best_column = moves[i]
+        if min_or_max == MAX:
+            if score >= beta:
+                break
+            alfa_v = max(alfa, score)
+        else:
+            if score <= alfa:
+                break
+            beta_v = min(beta, score)
+
+    return best_max_move, best_score, best_column
+
+
+def play_move_ai_deepening(game_board: np.ndarray, depth: int, which_player: int, played_moves: np.ndarray,
+                           number_of_moves: int, actual_player: int, game_parameters: Dict,
+                           budget: Optional[SearchBudget] = None) -> int:
+    """
+    function for playing as AI with iterative deepening - searches with depth 1, 2, ... up to depth, until
+    game_parameters['time_budget'] seconds or game_parameters['node_budget'] nodes are used, every search
+    starts with the best column of the previous one, depth 1 is always finished - unlike
+    bitboardSystem.play_move_ai_bitboard, which returns the last move of the searched line like
+    aiSystem.alpha_beta, it returns the best column, and the order of searches changes pruning,
+    so moves are different than moves of other searches
+    :param game_board: map of game size_x x size_y
+    :param depth: the biggest depth to analyze
+    :param which_player: who is going to move - use 1 or 2
+    :param played_moves: numpy array generated with generate_board
+    :param number_of_moves: how many moves played
+    :param actual_player: who is choosing move
+    :param game_parameters: parameters of the game
+    :param budget: budget, which counts nodes of this search, a new one if None
+    :return: the best column according to the deepest finished search
+    """
+    if budget is None:
+        budget = SearchBudget()
+    mask_1, mask_2 = board_to_bitboards(game_board, game_parameters)
+    heights = [int(played_moves[0][i]) for i in range(0, game_parameters['size_x'])]
+    empty_fields = game_parameters['size_x'] * game_parameters['size_y'] - sum(heights)
+    time_budget = game_parameters.get('time_budget', 0)
+    node_budget = game_parameters.get('node_budget', 0)
+    t0 = time.perf_counter()
+    start_nodes = budget.nodes
+    column = -1
+    for current_depth in range(1, min(depth, empty_fields) + 1):
+        if current_depth > 1:
+            if time_budget > 0:
+                budget.deadline = t0 + time_budget
+            if node_budget > 0:
+                budget.node_limit = start_nodes + node_budget
+        try:
+            result = alpha_beta_budget([0, mask_1, mask_2], list(heights), current_depth, MAX, 0,
+                                       INFINITY_NEGATIVE, INFINITY_POSITIVE, which_player, number_of_moves,
+                                       actual_player, game_parameters, budget, column)
+        except SearchTimeout:
+            break
+        finally:
+            budget.deadline = math.inf
+            budget.node_limit = math.inf
+        column = result[2]
+        budget.depth_reached = current_depth
+    return column
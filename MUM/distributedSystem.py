@@ -0,0 +1,136 @@
+import threading
+import time
+import numpy as np
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client, Connection
+from typing import Callable, List, Tuple, Union
+
+TRANSITION = np.dtype([('seat', np.uint8), ('action', np.uint8), ('state', np.int32), ('next_state', np.int32),
+                       ('reward', np.float32)])
+HEADER = np.dtype(np.int64)
+STOP = -1
+
+
+def parse_address(address: str) -> Union[Tuple[str, int], str]:
+    """
+    :param address: "host:port" of a TCP socket or a path of a Unix socket
+    :return: address for multiprocessing.connection
+    """
+    if ":" not in address:
+        return address
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def open_learner(address: str, authkey: str) -> Listener:
+    """
+    :param address: "host:port" of a TCP socket (port 0 - any free port) or a path of a Unix socket
+    :param authkey: key, which actors have to know to connect
+    :return: listener, listener.address is the address for actors
+    """
+    return Listener(parse_address(address), authkey=authkey.encode())
+
+
+def connect_actor(address: Union[str, Tuple[str, int]], authkey: str) -> Connection:
+    """
+    :param address: address of the learner
+    :param authkey: key of the learner
+    :return: connection to the learner
+    """
+    if isinstance(address, str):
+        address = parse_address(address)
+    return Client(address, authkey=authkey.encode())
+
+
+def accept_actors(listener: Listener, how_many: int, authkey: str, timeout: float,
+                  actors_alive: Callable[[], bool], stop_actors: Callable[[], None]) -> List[Connection]:
+    """
+    listener.accept() has no timeout, so actors are accepted by a thread, which is woken up by a connection
+    of this process, when waiting is stopped
+    :param listener: listener from open_learner
+    :param how_many: how many actors have to connect
+    :param authkey: key of the learner
+    :param timeout: how many seconds to wait for all actors
+    :param actors_alive: returns False, when an actor, which is expected to connect, has ended
+    :param stop_actors: stops local actors, before connections of accepted actors are closed
+    :return: connections to actors, RuntimeError is raised, when they do not connect in time
+    """
+    connections = []
+    stop = threading.Event()
+
+    def accept_all() -> None:
+        while len(connections) < how_many:
+            try:
+                connection = listener.accept()
+            except AuthenticationError:
+                continue
+            if stop.is_set():
+                connection.close()
+                return
+            connections.append(connection)
+
+    thread = threading.Thread(target=accept_all, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while thread.is_alive():
+        thread.join(0.1)
+        if thread.is_alive() and (not actors_alive() or time.monotonic() >= deadline):
+            stop.set()
+            connect_actor(listener.address, authkey).close()
+            thread.join()
+            if len(connections) == how_many:
+                return connections
+            stop_actors()
+            for connection in connections:
+                connection.close()
+            raise RuntimeError(str(len(connections)) + " of " + str(how_many) + " actors connected")
+    return connections
+
+
+def pack_transitions(version: int, episodes: int, transitions: np.ndarray) -> bytes:
+    """
+    :param version: version of q-tables, with which moves were chosen
+    :param episodes: how many games were played
+    :param transitions: array of TRANSITION
+    :return: message for the learner - header and 14 bytes for every move
+    """
+    return np.array([version, episodes], dtype=HEADER).tobytes() + transitions.astype(TRANSITION).tobytes()
+
+
+def unpack_transitions(message: bytes) -> Tuple[int, int, np.ndarray]:
+    """
+    :param message: message from pack_transitions
+    :return: version of q-tables, number of games and array of TRANSITION
+    """
+    header = np.frombuffer(message, dtype=HEADER, count=2)
+    return int(header[0]), int(header[1]), np.frombuffer(message, dtype=TRANSITION, offset=2 * HEADER.itemsize)
+
+
+def pack_snapshot(version: int, q_tables: List[np.ndarray] = None) -> bytes:
+    """
+    :param version: version of q-tables, STOP ends the work of the actor
+    :param q_tables: q-tables of both players, None if the actor has already got this version
+    :return: message for the actor
+    """
+    message = np.array([version], dtype=HEADER).tobytes()
+    if q_tables is None:
+        return message
+    return message + b"".join(np.ascontiguousarray(q_table, dtype=float).tobytes() for q_table in q_tables)
+
+
+def unpack_snapshot(message: bytes, shapes: List[Tuple[int, ...]]) -> Tuple[int, List[np.ndarray]]:
+    """
+    :param message: message from pack_snapshot
+    :param shapes: shapes of q-tables of both players
+    :return: version of q-tables and q-tables, None if message has only the version
+    """
+    version = int(np.frombuffer(message, dtype=HEADER, count=1)[0])
+    if len(message) == HEADER.itemsize:
+        return version, None
+    q_tables = []
+    offset = HEADER.itemsize
+    for shape in shapes:
+        count = int(np.prod(shape))
+        q_tables.append(np.frombuffer(message, dtype=float, count=count, offset=offset).reshape(shape).copy())
+        offset += count * np.dtype(float).itemsize
+    return version, q_tables
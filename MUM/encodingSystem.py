@@ -0,0 +1,99 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from MUM.bitboardSystem import board_to_bitboards, position_key
+
+KEY_BITS = 63
+
+
+def check_key_size(game_parameters: Dict) -> None:
+    """
+    every column takes size_y + 1 bits of the key, so the key of the whole map has to fit in int64
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    if game_parameters['size_x'] * (game_parameters['size_y'] + 1) > KEY_BITS:
+        raise ValueError("Map " + str(game_parameters['size_x']) + "x" + str(game_parameters['size_y']) +
+                         " is too big for int64 keys")
+
+
+def encode_board(game_board: np.ndarray, game_parameters: Dict) -> int:
+    """
+    :param game_board: map of game size_x x size_y
+    :param game_parameters: parameters of the game
+    :return: key of the map - the same in every process and every run, different for different maps
+    """
+    mask_1, mask_2 = board_to_bitboards(game_board, game_parameters)
+    return position_key(mask_1, mask_2)
+
+
+def decode_keys(keys: np.ndarray, game_parameters: Dict) -> np.ndarray:
+    """
+    every column of the key is coins of the first player + 2^height - 1, so it is between 2^height - 1
+    and 2^(height + 1) - 2, and the height and coins can be read back
+    :param keys: int64 keys of maps
+    :param game_parameters: parameters of the game
+    :return: numpy array N x size_y x size_x of maps
+    """
+    size_x = game_parameters['size_x']
+    size_y = game_parameters['size_y']
+    keys = np.asarray(keys, dtype=np.int64).reshape(-1)
+    boards = np.zeros((len(keys), size_y, size_x), dtype=int)
+    column_mask = np.int64((1 << (size_y + 1)) - 1)
+    for x in range(0, size_x):
+        column = ((keys >> np.int64(x * (size_y + 1))) & column_mask) + 1
+        heights = np.zeros(len(keys), dtype=np.int64)
+        for y in range(1, size_y + 1):
+            heights += column >= (1 << y)
+        coins = column - (np.int64(1) << heights)
+        for y in range(0, size_y):
+            boards[:, y, x] = np.where(y < heights, np.where((coins >> np.int64(y)) & 1, 1, 2), 0)
+    return boards
+
+
+def keys_to_bitboards(keys: np.ndarray, game_parameters: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :param keys: int64 keys of maps
+    :param game_parameters: parameters of the game
+    :return: int64 bitmasks of the first and the second player (bitboardSystem.bit_index)
+    """
+    size_y = game_parameters['size_y']
+    keys = np.asarray(keys, dtype=np.int64)
+    mask_1 = np.zeros(keys.shape, dtype=np.int64)
+    taken = np.zeros(keys.shape, dtype=np.int64)
+    column_mask = np.int64((1 << (size_y + 1)) - 1)
+    for x in range(0, game_parameters['size_x']):
+        shift = np.int64(x * (size_y + 1))
+        column = ((keys >> shift) & column_mask) + 1
+        heights = np.zeros(keys.shape, dtype=np.int64)
+        for y in range(1, size_y + 1):
+            heights += column >= (1 << y)
+        full = np.int64(1) << heights
+        mask_1 |= (column - full) << shift
+        taken |= (full - 1) << shift
+    return mask_1, taken & ~mask_1
+
+
+def mirror_keys(keys: np.ndarray, game_parameters: Dict) -> np.ndarray:
+    """
+    :param keys: int64 keys of maps
+    :param game_parameters: parameters of the game
+    :return: int64 keys of maps mirrored left to right - columns of the key are written in reverse order
+    """
+    size_x = game_parameters['size_x']
+    width = game_parameters['size_y'] + 1
+    keys = np.asarray(keys, dtype=np.int64)
+    mirrored = np.zeros(keys.shape, dtype=np.int64)
+    column_mask = np.int64((1 << width) - 1)
+    for x in range(0, size_x):
+        mirrored |= ((keys >> np.int64(x * width)) & column_mask) << np.int64((size_x - 1 - x) * width)
+    return mirrored
+
+
+def merge_keys(key_lists: List[np.ndarray]) -> np.ndarray:
+    """
+    :param key_lists: int64 keys found by different workers
+    :return: sorted keys without duplicates
+    """
+    if len(key_lists) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.unique(np.concatenate([np.asarray(keys, dtype=np.int64) for keys in key_lists]))
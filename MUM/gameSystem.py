@@ -2,25 +2,15 @@ import numpy as np
 import math
 from typing import Dict
 from MUM.aiSystem import alpha_beta, generate_board
+from MUM.bitboardSystem import play_move_ai_bitboard
+from MUM.deepeningSystem import play_move_ai_deepening
+from MUM.stateSystem import legal_moves
 
 MAX = 1
 INFINITY_POSITIVE = math.inf
 INFINITY_NEGATIVE = -math.inf
 
 
-def is_ending_state(prizes: np.ndarray, game_parameters: Dict) -> bool:
-    """
-    checks if the game is in ending state
-    :param prizes: numpy array containing prizes for playing certain moves
-    :param game_parameters: parameters of the game
-    :return: is in ending state or not, based od prizes
-    """
-    for i in range(0, game_parameters['size_x']):
-        if prizes[i] != game_parameters['not_allowed_move_prize']:
-            return False
-    return True
-
-
 def return_first_state(tables: Dict, game_parameters: Dict) -> int:
     """
     function which returns starting state
@@ -53,17 +43,16 @@ def play_game(model_first: bool, real_player: bool,
     number_of_moves = 0
     max_moves = game_parameters['max_n_moves']
     state = return_first_state(tables, game_parameters)
-    while not is_ending_state(tables['Prizes'][which_player][state],
-                              game_parameters) and number_of_moves != max_moves:
+    while not tables['Terminals'][which_player - 1][state] and number_of_moves != max_moves:
         if which_player == 1:
             if model_first:
                 move = play_move_model(tables, which_player,
                                        state, game_parameters)
             else:
                 if not real_player:
-                    move = play_move_ai(tables['Boards'][which_player][state],
+                    move = play_move_ai(tables['Boards'][which_player - 1][state],
                                         game_parameters['depth_1'],
-                                        which_player, generate_board(tables['Boards'][which_player][state],
+                                        which_player, generate_board(tables['Boards'][which_player - 1][state],
                                                                      game_parameters),
                                         number_of_moves, which_player, game_parameters)
                 else:
@@ -74,15 +63,15 @@ def play_game(model_first: bool, real_player: bool,
                                        state, game_parameters)
             else:
                 if not real_player:
-                    move = play_move_ai(tables['Boards'][which_player][state],
+                    move = play_move_ai(tables['Boards'][which_player - 1][state],
                                         game_parameters['depth_2'],
-                                        which_player, generate_board(tables['Boards'][which_player][state],
+                                        which_player, generate_board(tables['Boards'][which_player - 1][state],
                                                                      game_parameters),
                                         number_of_moves, which_player, game_parameters)
                 else:
                     move = 0
 
-        state = tables['States'][which_player - 1][move]
+        state = tables['States'][which_player - 1][state][move]
         number_of_moves += 1
         which_player = (which_player % 2) + 1
 
@@ -90,27 +79,28 @@ def play_game(model_first: bool, real_player: bool,
 def play_move_model(tables: Dict, which_player: int,
                     current_state: int, game_parameters: Dict) -> int:
     """
-    DON'T USE THIS FUNCTION, IT'S NOT DONE
     :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
-    :param which_player: who is playing a move
+    :param which_player: who is playing a move - use 1 or 2
     :param current_state: index of state
     :param game_parameters: parameters of the game
-    :return:
+    :return: allowed move with the biggest q-value, the first one of equal moves
     """
-    max_value = tables['Q-tables'][which_player][current_state][0]
-    action = 0
-    for i in range(0, game_parameters['size_x']):
-        if tables['Q-tables'][which_player][current_state][i] > max_value:
-            max_value = tables['Q-tables'][which_player][current_state][i]
-            action = i
-
+    moves = legal_moves(tables, which_player, current_state, game_parameters)
+    q_values = tables['Q-Tables'][which_player - 1][current_state]
+    action = moves[0]
+    for move in moves:
+        if q_values[move] > q_values[action]:
+            action = move
     return action
 
 
 def play_move_ai(game_board: np.ndarray, depth: int, which_player: int, played_moves: np.ndarray,
                  number_of_moves: int, actual_player: int, game_parameters: Dict) -> int:
     """
-    function for playing as AI
+    function for playing as AI - game_parameters['search_engine'] chooses between the bitboard
+    search (default) and the original numpy one ("numpy"), both return the same moves,
+    game_parameters['time_budget'] (seconds) or ['node_budget'] > 0 turn on iterative deepening up to depth,
+    which returns the best column of the deepest finished search, so it plays other moves than the searches above
     :param game_board: map of game size_x x size_y
     :param depth: how many possible moves to analyze
     :param which_player: who is going to move - use 1 or 2
@@ -120,6 +110,12 @@ def play_move_ai(game_board: np.ndarray, depth: int, which_player: int, played_m
     :param game_parameters: parameters of the game
     :return: which move is going to be the best
     """
+    if game_parameters.get('search_engine', 'bitboard') == 'bitboard':
+        if game_parameters.get('time_budget', 0) > 0 or game_parameters.get('node_budget', 0) > 0:
+            return play_move_ai_deepening(game_board, depth, which_player, played_moves,
+                                          number_of_moves, actual_player, game_parameters)
+        return play_move_ai_bitboard(game_board, depth, which_player, played_moves,
+                                     number_of_moves, actual_player, game_parameters)
     move = alpha_beta(game_board, depth, MAX, 0, INFINITY_NEGATIVE, INFINITY_POSITIVE,
                       which_player, played_moves, number_of_moves, actual_player, game_parameters)
     return move[0]
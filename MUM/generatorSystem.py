@@ -0,0 +1,505 @@
+import os
+import json
+import time
+import multiprocessing as mp
+import numpy as np
+from typing import Dict, List, Tuple
+from MUM.bitboardSystem import bit_index, has_won_many
+from MUM.encodingSystem import check_key_size, decode_keys, keys_to_bitboards, merge_keys, mirror_keys
+from MUM.rewardSystem import prepare_move_features, prepare_prizes_from_features, REWARD_WEIGHTS
+from MUM.stateSystem import process_number, prepare_legal_moves, prepare_ending_flags, add_ending_flags, \
+    save_tables, return_path, is_json_file, column_file_name, COLUMN_TYPES, TABLES_VERSION, MANIFEST_NAME
+from MUM.data_handler import append_to_csv
+
+
+def return_column_masks(game_parameters: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :param game_parameters: parameters of the game
+    :return: int64 masks of the bottom field, the top field and all fields of every column
+    """
+    size_y = game_parameters['size_y']
+    columns = range(0, game_parameters['size_x'])
+    bottom = np.array([1 << bit_index(x, 0, size_y) for x in columns], dtype=np.int64)
+    top = np.array([1 << bit_index(x, size_y - 1, size_y) for x in columns], dtype=np.int64)
+    column = np.array([((1 << size_y) - 1) << bit_index(x, 0, size_y) for x in columns], dtype=np.int64)
+    return bottom, top, column
+
+
+def expand_keys(keys: np.ndarray, ply: int, game_parameters: Dict) -> np.ndarray:
+    """
+    the whole frontier is expanded at once, one column after another,
+    states, in which the last move has won, are not expanded
+    :param keys: int64 keys of states of one ply
+    :param ply: how many moves have been played
+    :param game_parameters: parameters of the game, with canonical=1 next states are replaced
+    with the smaller key of the map and its mirror
+    :return: int64 keys of next states N x size_x, -1 for not allowed moves
+    """
+    size_y = game_parameters['size_y']
+    bottom, top, column = return_column_masks(game_parameters)
+    mask_1, mask_2 = keys_to_bitboards(keys, game_parameters)
+    mover = mask_1 if ply % 2 == 0 else mask_2
+    taken = mask_1 | mask_2
+    ended = has_won_many(mask_2 if ply % 2 == 0 else mask_1, size_y, game_parameters['min_to_win'])
+    next_keys = np.full((len(keys), game_parameters['size_x']), -1, dtype=np.int64)
+    for x in range(0, game_parameters['size_x']):
+        allowed = ((taken & top[x]) == 0) & ~ended
+        # adding the bottom field of the column moves its lowest empty field to taken fields
+        new_coin = (taken[allowed] + bottom[x]) & column[x]
+        child_mover = mover[allowed] | new_coin
+        child_taken = taken[allowed] | new_coin
+        next_keys[allowed, x] = child_mover + child_taken if ply % 2 == 0 else \
+            (child_taken & ~child_mover) + child_taken
+    if game_parameters.get('canonical', 0):
+        next_keys = np.where(next_keys != -1, np.minimum(next_keys, mirror_keys(next_keys, game_parameters)), -1)
+    return next_keys
+
+
+def prepare_flips(keys: np.ndarray, ply: int, game_parameters: Dict) -> np.ndarray:
+    """
+    :param keys: int64 keys of states of one ply
+    :param ply: how many moves have been played
+    :param game_parameters: parameters of the game
+    :return: uint16 bitmask of moves, after which the next state is kept in tables as its mirror
+    """
+    next_keys = expand_keys(keys, ply, {**game_parameters, 'canonical': 0})
+    flips = (next_keys != -1) & (mirror_keys(next_keys, game_parameters) < next_keys)
+    return (flips.astype(np.uint16) << np.arange(0, game_parameters['size_x'], dtype=np.uint16)).sum(
+        axis=1, dtype=np.uint16)
+
+
+def prepare_plies(game_parameters: Dict) -> List[Dict]:
+    """
+    generates all states ply by ply - duplicates are removed with np.unique
+    :param game_parameters: parameters of the game
+    :return: for every ply sorted int64 keys of states and indexes of next states in the next ply
+    (int32 N x size_x, -1 for not allowed moves)
+    """
+    check_key_size(game_parameters)
+    keys = np.zeros(1, dtype=np.int64)
+    plies = []
+    for ply in range(0, game_parameters['size_x'] * game_parameters['size_y'] + 1):
+        next_keys = expand_keys(keys, ply, game_parameters)
+        allowed = next_keys != -1
+        new_keys = np.unique(next_keys[allowed])
+        next_index = np.full(next_keys.shape, -1, dtype=np.int32)
+        next_index[allowed] = np.searchsorted(new_keys, next_keys[allowed])
+        plies.append({"keys": keys, "next_index": next_index})
+        keys = new_keys
+    return plies
+
+
+def return_shards(keys: np.ndarray, number_of_shards: int) -> np.ndarray:
+    """
+    :param keys: int64 keys of states
+    :param number_of_shards: number of shards
+    :return: shard of every key - the same in every process and every run
+    """
+    # Fibonacci hashing spreads keys, which differ only in a few columns, over all shards
+    mixed = np.asarray(keys, dtype=np.int64).view(np.uint64) * np.uint64(11400714819323198485)
+    return ((mixed >> np.uint64(32)) % np.uint64(number_of_shards)).astype(np.int64)
+
+
+def return_work_path(directory: str, name: str, ply: int, *shards: int, extension: str = ".npy") -> str:
+    """
+    :param directory: folder with work files
+    :param name: what is saved in the file
+    :param ply: how many moves have been played
+    :param shards: shards or chunks, which the file belongs to
+    :param extension: .npy or .bin for raw arrays, which are written part by part
+    :return: path of the work file
+    """
+    return os.path.join(directory, "_".join([name, str(ply)] + [str(shard) for shard in shards]) + extension)
+
+
+def expand_shard(directory: str, ply: int, shard: int, number_of_shards: int, game_parameters: Dict) -> None:
+    """
+    expands one shard of the frontier and spills its next states split by the shard of the next state
+    :param directory: folder with work files
+    :param ply: how many moves have been played
+    :param shard: which shard of the frontier
+    :param number_of_shards: number of shards
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    keys = np.load(return_work_path(directory, "keys", ply, shard))
+    next_keys = expand_keys(keys, ply, game_parameters)
+    np.save(return_work_path(directory, "next", ply, shard), next_keys)
+    children = np.unique(next_keys[next_keys != -1])
+    shards = return_shards(children, number_of_shards)
+    for i in range(0, number_of_shards):
+        np.save(return_work_path(directory, "children", ply, shard, i), children[shards == i])
+
+
+def merge_shard(directory: str, ply: int, shard: int, number_of_shards: int) -> int:
+    """
+    merges next states of one shard found by all workers into the shard of the next frontier
+    :param directory: folder with work files
+    :param ply: how many moves have been played
+    :param shard: which shard of the next frontier
+    :param number_of_shards: number of shards
+    :return: number of states in the shard
+    """
+    paths = [return_work_path(directory, "children", ply, i, shard) for i in range(0, number_of_shards)]
+    keys = merge_keys([np.load(path) for path in paths])
+    np.save(return_work_path(directory, "keys", ply + 1, shard), keys)
+    for path in paths:
+        os.remove(path)
+    return len(keys)
+
+
+def index_shard(directory: str, ply: int, shard: int, offsets: List[int], game_parameters: Dict) -> None:
+    """
+    replaces keys of next states of one shard with their indexes in the next ply
+    :param directory: folder with work files
+    :param ply: how many moves have been played
+    :param shard: which shard of the frontier
+    :param offsets: index of the first state of every shard of the next ply
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    path = return_work_path(directory, "next", ply, shard)
+    next_keys = np.load(path)
+    next_index = np.full(next_keys.shape, -1, dtype=np.int32)
+    shards = np.where(next_keys != -1, return_shards(next_keys, len(offsets)), -1)
+    for i in range(0, len(offsets)):
+        found = shards == i
+        if not found.any():
+            continue
+        new_keys = np.load(return_work_path(directory, "keys", ply + 1, i), mmap_mode="r")
+        next_index[found] = np.searchsorted(new_keys, next_keys[found]) + offsets[i]
+    np.save(return_work_path(directory, "index", ply, shard), next_index)
+    os.remove(path)
+
+
+def prepare_plies_parallel(game_parameters: Dict) -> List[Dict]:
+    """
+    prepare_plies on a pool of process_number(process_percent) processes - every ply is split into shards
+    by return_shards, workers expand their shards, then every worker merges one shard of the next ply,
+    data between steps is passed by .npy files in the folder of the game
+    :param game_parameters: parameters of the game
+    :return: plies like in prepare_plies, but states of one ply are sorted by shard and then by key
+    """
+    check_key_size(game_parameters)
+    number_of_processes = process_number(game_parameters['process_percent'])
+    number_of_shards = number_of_processes
+    directory = os.path.join(game_parameters['folder_name'], "generator_work")
+    os.makedirs(directory, exist_ok=True)
+    shards = range(0, number_of_shards)
+    last_ply = game_parameters['size_x'] * game_parameters['size_y']
+    keys = np.zeros(1, dtype=np.int64)
+    for i in shards:
+        np.save(return_work_path(directory, "keys", 0, i), keys[return_shards(keys, number_of_shards) == i])
+    with mp.Pool(number_of_processes) as pool:
+        for ply in range(0, last_ply + 1):
+            pool.starmap(expand_shard, [(directory, ply, i, number_of_shards, game_parameters) for i in shards])
+            sizes = pool.starmap(merge_shard, [(directory, ply, i, number_of_shards) for i in shards])
+            offsets = list(np.cumsum([0] + sizes[:-1]))
+            pool.starmap(index_shard, [(directory, ply, i, offsets, game_parameters) for i in shards])
+
+    plies = []
+    for ply in range(0, last_ply + 1):
+        paths = [return_work_path(directory, "keys", ply, i) for i in shards]
+        index_paths = [return_work_path(directory, "index", ply, i) for i in shards]
+        plies.append({"keys": np.concatenate([np.load(path) for path in paths]),
+                      "next_index": np.concatenate([np.load(path) for path in index_paths])})
+        for path in paths + index_paths:
+            os.remove(path)
+    for path in [return_work_path(directory, "keys", last_ply + 1, i) for i in shards]:
+        os.remove(path)
+    os.rmdir(directory)
+    return plies
+
+
+def prepare_tables_vectorized(plies: List[Dict], game_parameters: Dict) -> Dict:
+    """
+    tables like stateSystem.prepare_tables - states of every player are ordered by ply and then like in plies
+    :param plies: plies from prepare_plies
+    :param game_parameters: parameters of the game
+    :return: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    """
+    size_x = game_parameters['size_x']
+    print("Preparing states")
+    t0 = time.time()
+    offsets = [0, 0]
+    for i in range(0, len(plies)):
+        plies[i]['first_id'] = offsets[i % 2]
+        offsets[i % 2] += len(plies[i]['keys'])
+    states = [[np.zeros((0, size_x), dtype=np.int32)], [np.zeros((0, size_x), dtype=np.int32)]]
+    for i in range(0, len(plies)):
+        next_index = plies[i]['next_index']
+        if i + 1 < len(plies):
+            next_index = np.where(next_index != -1, next_index + plies[i + 1]['first_id'], -1).astype(np.int32)
+        states[i % 2].append(next_index)
+    states = [np.concatenate(states[0]), np.concatenate(states[1])]
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingStates", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+
+    print("Preparing Prizes")
+    t0 = time.time()
+    features = [[np.zeros((0, size_x, len(REWARD_WEIGHTS)), dtype=np.int8)] for i in range(0, 2)]
+    for i in range(0, len(plies)):
+        features[i % 2].append(prepare_move_features(*keys_to_bitboards(plies[i]['keys'], game_parameters),
+                                                     plies[i]['next_index'] != -1, (i % 2) + 1, game_parameters))
+    features = [np.concatenate(features[0]), np.concatenate(features[1])]
+    prizes = [prepare_prizes_from_features(features[i], states[i], game_parameters) for i in range(0, 2)]
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingPrizes", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+
+    print("Preparing game boards")
+    t0 = time.time()
+    keys = [[np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]]
+    for i in range(0, len(plies)):
+        keys[i % 2].append(plies[i]['keys'])
+    boards = [decode_keys(np.concatenate(keys[i]), game_parameters).astype(np.int8) for i in range(0, 2)]
+    tables = {"States": states,
+              "Q-Tables": [np.zeros((len(states[0]), size_x), dtype=float),
+                           np.zeros((len(states[1]), size_x), dtype=float)],
+              "Prizes": prizes, "Boards": boards, "Features": features,
+              "Legal-Moves": [prepare_legal_moves(states[0]), prepare_legal_moves(states[1])]}
+    add_ending_flags(tables, game_parameters)
+    if game_parameters.get('canonical', 0):
+        flips = [[np.zeros(0, dtype=np.uint16)], [np.zeros(0, dtype=np.uint16)]]
+        for i in range(0, len(plies)):
+            flips[i % 2].append(prepare_flips(plies[i]['keys'], i, game_parameters))
+        tables['Flips'] = [np.concatenate(flips[0]), np.concatenate(flips[1])]
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingGameBoards", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    return tables
+
+
+def return_chunk_size(game_parameters: Dict) -> int:
+    """
+    :param game_parameters: parameters of the game, memory_budget - MB used by the streaming generator (1024)
+    :return: how many states are processed at once, so that work arrays fit in memory_budget
+    """
+    size_x = game_parameters['size_x']
+    # decoded boards, next keys, features, prizes, indexes and masks of one state
+    bytes_per_state = 8 * (size_x * game_parameters['size_y'] + 8 * size_x + 16)
+    return max(1024, game_parameters.get('memory_budget', 1024) * 2 ** 20 // bytes_per_state)
+
+
+def read_raw(path: str, start: int = 0, count: int = -1, dtype: type = np.int64) -> np.ndarray:
+    """
+    :param path: path of the .bin work file
+    :param start: index of the first element
+    :param count: how many elements, -1 for all of them
+    :param dtype: type of elements
+    :return: part of the array saved in the file
+    """
+    return np.fromfile(path, dtype=dtype, count=count, offset=start * np.dtype(dtype).itemsize)
+
+
+def append_raw(path: str, array: np.ndarray) -> None:
+    """
+    :param path: path of the .bin work file
+    :param array: array appended to the file
+    :return:
+    """
+    with open(path, "ab") as file:
+        file.write(np.ascontiguousarray(array).tobytes())
+
+
+def merge_runs(run_paths: List[str], id_paths: List[str], output_path: str, block: int) -> int:
+    """
+    external merge of sorted runs of keys - only block keys of every run are loaded at once, keys not bigger
+    than the smallest last loaded key are merged, so none of them can appear later,
+    for every key of every run its index in the output is saved to id_paths
+    :param run_paths: .bin files with sorted keys without duplicates
+    :param id_paths: .bin files, to which indexes of keys in the output are written
+    :param output_path: .bin file, to which sorted keys without duplicates are written
+    :param block: how many keys of every run are loaded at once
+    :return: number of keys in the output
+    """
+    lengths = [os.path.getsize(path) // 8 for path in run_paths]
+    positions = [0] * len(run_paths)
+    buffers = [np.zeros(0, dtype=np.int64)] * len(run_paths)
+    written = 0
+    open(output_path, "wb").close()
+    for path in id_paths:
+        open(path, "wb").close()
+    while True:
+        for i in range(0, len(run_paths)):
+            if len(buffers[i]) == 0 and positions[i] < lengths[i]:
+                buffers[i] = read_raw(run_paths[i], positions[i], block)
+                positions[i] += len(buffers[i])
+        if all(len(buffer) == 0 for buffer in buffers):
+            return written
+        loaded = [buffers[i][-1] for i in range(0, len(run_paths)) if positions[i] < lengths[i]]
+        taken = [len(buffer) if len(loaded) == 0 else int(np.searchsorted(buffer, min(loaded), side="right"))
+                 for buffer in buffers]
+        merged = np.unique(np.concatenate([buffers[i][:taken[i]] for i in range(0, len(run_paths))]))
+        append_raw(output_path, merged)
+        for i in range(0, len(run_paths)):
+            if taken[i] > 0:
+                append_raw(id_paths[i], np.searchsorted(merged, buffers[i][:taken[i]]) + written)
+                buffers[i] = buffers[i][taken[i]:]
+        written += len(merged)
+
+
+def prepare_plies_streaming(game_parameters: Dict, directory: str) -> List[int]:
+    """
+    prepare_plies, which keeps only return_chunk_size states in memory - every ply is expanded chunk by chunk,
+    sorted next states of every chunk are spilled to disk, the next ply is made by merge_runs
+    and next states of every chunk are replaced with their indexes using indexes of keys of its run
+    :param game_parameters: parameters of the game
+    :param directory: folder for work files - ply i is saved as keys_i.bin (sorted int64 keys)
+    and index_i.bin (int32 N x size_x indexes of next states in ply i + 1)
+    :return: number of states in every ply
+    """
+    check_key_size(game_parameters)
+    size_x = game_parameters['size_x']
+    chunk = return_chunk_size(game_parameters)
+    append_raw(return_work_path(directory, "keys", 0, extension=".bin"), np.zeros(1, dtype=np.int64))
+    sizes = [1]
+    for ply in range(0, size_x * game_parameters['size_y'] + 1):
+        keys_path = return_work_path(directory, "keys", ply, extension=".bin")
+        chunks = range(0, (sizes[ply] + chunk - 1) // chunk)
+        run_paths = [return_work_path(directory, "run", ply, i, extension=".bin") for i in chunks]
+        id_paths = [return_work_path(directory, "ids", ply, i, extension=".bin") for i in chunks]
+        for i in chunks:
+            next_keys = expand_keys(read_raw(keys_path, i * chunk, chunk), ply, game_parameters)
+            np.save(return_work_path(directory, "next", ply, i), next_keys)
+            append_raw(run_paths[i], np.unique(next_keys[next_keys != -1]))
+        sizes.append(merge_runs(run_paths, id_paths, return_work_path(directory, "keys", ply + 1, extension=".bin"),
+                                max(1024, chunk // max(1, len(run_paths)))))
+        index_path = return_work_path(directory, "index", ply, extension=".bin")
+        open(index_path, "wb").close()
+        for i in chunks:
+            next_path = return_work_path(directory, "next", ply, i)
+            next_keys = np.load(next_path)
+            next_index = np.full(next_keys.shape, -1, dtype=np.int32)
+            allowed = next_keys != -1
+            next_index[allowed] = read_raw(id_paths[i])[np.searchsorted(read_raw(run_paths[i]), next_keys[allowed])]
+            append_raw(index_path, next_index)
+            for path in (next_path, run_paths[i], id_paths[i]):
+                os.remove(path)
+    os.remove(return_work_path(directory, "keys", len(sizes) - 1, extension=".bin"))
+    return sizes[:-1]
+
+
+def save_plies_streaming(sizes: List[int], directory: str, file_name: str, game_parameters: Dict) -> None:
+    """
+    writes tables like save_tables_binary directly from work files of prepare_plies_streaming,
+    every column is a .npy file opened with np.lib.format.open_memmap and filled chunk by chunk
+    :param sizes: number of states in every ply
+    :param directory: folder with work files
+    :param file_name: name of the directory with tables
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    if is_json_file(file_name):
+        raise ValueError("Streaming generator saves only directories of .npy files, not " + file_name)
+    size_x = game_parameters['size_x']
+    size_y = game_parameters['size_y']
+    chunk = return_chunk_size(game_parameters)
+    path = return_path(file_name, game_parameters)
+    os.makedirs(path, exist_ok=True)
+    first_ids = [sum(sizes[j] for j in range(i % 2, i, 2)) for i in range(0, len(sizes) + 1)]
+    counts = [sum(sizes[0::2]), sum(sizes[1::2])]
+    shapes = {"States": (size_x,), "Q-Tables": (size_x,), "Prizes": (size_x,), "Boards": (size_y, size_x),
+              "Features": (size_x, len(REWARD_WEIGHTS)), "Legal-Moves": (), "Terminals": (), "Winners": (),
+              "Draws": ()}
+    if game_parameters.get('canonical', 0):
+        shapes['Flips'] = ()
+    columns = {key: [np.lib.format.open_memmap(os.path.join(path, column_file_name(key, i)), mode="w+",
+                                                dtype=COLUMN_TYPES[key], shape=(counts[i],) + shapes[key])
+                     for i in range(0, 2)] for key in shapes}
+    for ply in range(0, len(sizes)):
+        seat = ply % 2
+        keys_path = return_work_path(directory, "keys", ply, extension=".bin")
+        index_path = return_work_path(directory, "index", ply, extension=".bin")
+        for start in range(0, sizes[ply], chunk):
+            keys = read_raw(keys_path, start, chunk)
+            next_index = read_raw(index_path, start * size_x, len(keys) * size_x, np.int32).reshape(-1, size_x)
+            states = np.where(next_index != -1, next_index + first_ids[ply + 1], -1)
+            boards = decode_keys(keys, game_parameters)
+            rows = slice(first_ids[ply] + start, first_ids[ply] + start + len(keys))
+            columns['States'][seat][rows] = states
+            features = prepare_move_features(*keys_to_bitboards(keys, game_parameters), next_index != -1, seat + 1,
+                                             game_parameters)
+            columns['Features'][seat][rows] = features
+            columns['Prizes'][seat][rows] = prepare_prizes_from_features(features, states, game_parameters)
+            columns['Boards'][seat][rows] = boards
+            columns['Legal-Moves'][seat][rows] = prepare_legal_moves(states)
+            columns['Terminals'][seat][rows], columns['Winners'][seat][rows], columns['Draws'][seat][rows] = \
+                prepare_ending_flags(states, boards, game_parameters)
+            if 'Flips' in columns:
+                columns['Flips'][seat][rows] = prepare_flips(keys, ply, game_parameters)
+        for name in (keys_path, index_path):
+            os.remove(name)
+    manifest = {"version": TABLES_VERSION, "mode": 0, "columns": {}, "values": {}}
+    for key in columns:
+        for array in columns[key]:
+            array.flush()
+        manifest['columns'][key] = {"dtype": np.dtype(COLUMN_TYPES[key]).name,
+                                    "shapes": [list(array.shape) for array in columns[key]]}
+    with open(os.path.join(path, MANIFEST_NAME), "w") as file:
+        json.dump(manifest, file)
+
+
+def save_and_generate_tables(game_parameters: Dict) -> None:
+    """
+    save_and_prepare_tables, which uses the vectorized generator, on many processes if process_percent allows it
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    print("Preparing game tree")
+    t0 = time.time()
+    if process_number(game_parameters['process_percent']) > 1:
+        plies = prepare_plies_parallel(game_parameters)
+    else:
+        plies = prepare_plies(game_parameters)
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingGameTree", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+
+    print("Conversion")
+    t0 = time.time()
+    tables = prepare_tables_vectorized(plies, game_parameters)
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "GeneratedDataConversion", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+
+    print("Saving")
+    t0 = time.time()
+    save_tables(tables, game_parameters['Generate_tables'], game_parameters)
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "SavingTables", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+
+
+def save_and_stream_tables(game_parameters: Dict) -> None:
+    """
+    save_and_generate_tables, which keeps in memory only memory_budget MB of work arrays,
+    states are kept on disk in the folder of the game
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    directory = os.path.join(game_parameters['folder_name'], "generator_work")
+    os.makedirs(directory, exist_ok=True)
+    print("Preparing game tree")
+    t0 = time.time()
+    sizes = prepare_plies_streaming(game_parameters, directory)
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingGameTree", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+
+    print("Saving")
+    t0 = time.time()
+    save_plies_streaming(sizes, directory, game_parameters['Generate_tables'], game_parameters)
+    os.rmdir(directory)
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "SavingTables", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
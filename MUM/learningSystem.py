@@ -1,26 +1,21 @@
 import copy
+import heapq
 import sys
 import os
+import time
 import numpy as np
 import random
-from typing import Dict, List
-from gameSystem import is_ending_state, return_first_state, play_move_ai, generate_board
-from stateSystem import save_tables, available_moves, convert_dict_read, read_tables
+from typing import Dict, List, Tuple
+from gameSystem import return_first_state, play_move_ai, generate_board, play_move_model
+from stateSystem import save_tables, read_tables, legal_moves, process_number
+from opponentSystem import has_ai_moves, play_move_precomputed
+from solverSystem import play_move_perfect
+from sharedSystem import share_tables, attach_tables, release_tables
 import multiprocessing as mp
-from data_handler import append_to_txt
-
-
-def is_draw(board: np.ndarray, game_parameters: Dict) -> bool:
-    """
-    function to check if there is a draw
-    :param board: map of game size_x x size_y
-    :param game_parameters: parameters of the game
-    :return: is a draw or not
-    """
-    draw_map = np.zeros((game_parameters['size_y'],
-                         game_parameters['size_x']), dtype=int)
-    compare_maps = draw_map == board
-    return not compare_maps.any()
+from multiprocessing.connection import wait
+from distributedSystem import TRANSITION, STOP, open_learner, connect_actor, accept_actors, pack_transitions, \
+    unpack_transitions, pack_snapshot, unpack_snapshot
+from data_handler import append_to_txt, append_to_csv
 
 
 def return_next_max(tables: Dict, which_player: int,
@@ -33,9 +28,9 @@ def return_next_max(tables: Dict, which_player: int,
     :param game_parameters: parameters of the game
     :return: next q-max
     """
-    if is_ending_state(tables['Prizes'][which_player % 2][next_state_p], game_parameters):
+    if tables['Winners'][which_player % 2][next_state_p] != 0:
         return game_parameters['win_prize']
-    elif is_draw(tables['States'][which_player % 2][next_state_p], game_parameters):
+    elif tables['Draws'][which_player % 2][next_state_p]:
         return game_parameters['draw_prize']
     else:
         action = 0
@@ -68,15 +63,7 @@ def train_model(tables: Dict, which_player: int,
         while tables['States'][which_player - 1][current_state][action] == -1:
             action = random.randint(0, game_parameters['size_x'] - 1)
     else:
-        moves = available_moves(generate_board(tables['Boards'][which_player - 1][current_state],
-                                               game_parameters), game_parameters['size_y'], game_parameters['size_x'])
-        action = moves[0]
-        max_value = tables['Q-Tables'][which_player - 1][current_state][action]
-        for i in range(0, game_parameters['size_x']):
-            if tables['Q-Tables'][which_player - 1][current_state][i] > max_value and \
-                    tables['States'][which_player - 1][current_state][i] != -1:
-                max_value = tables['Q-Tables'][which_player - 1][current_state][i]
-                action = i
+        action = play_move_model(tables, which_player, current_state, game_parameters)
     next_state = tables['States'][which_player - 1][current_state][action]
     reward = tables['Prizes'][which_player - 1][current_state][action]
     old_value = tables['Q-Tables'][which_player - 1][current_state][action]
@@ -100,6 +87,35 @@ def random_agent(game_parameters: Dict, model_first: bool) -> bool:
         return random.uniform(0, 1) <= game_parameters['random_moves2']
 
 
+def play_move_opponent(tables: Dict, which_player: int, state: int, number_of_moves: int,
+                       is_random_agent: bool, depth: int, game_parameters: Dict) -> int:
+    """
+    function which returns move of the opponent of the model - random, perfect (with perfect_opponent set
+    and solved tables), precomputed by opponentSystem.prepare_ai_moves or found with alpha-beta search -
+    with 'Flips' alpha-beta searches the map kept in tables, its ordering of moves is not symmetric,
+    so it may play other moves than on the real map, which can be the mirror
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who is going to move
+    :param state: index of state
+    :param number_of_moves: how many moves played
+    :param is_random_agent: is opponent choosing moves randomly
+    :param depth: depth of the alpha-beta search
+    :param game_parameters: parameters of the game
+    :return: move of the opponent
+    """
+    if is_random_agent:
+        moves = list(legal_moves(tables, which_player, state, game_parameters))
+        np.random.shuffle(moves)
+        return moves[0]
+    if game_parameters.get('perfect_opponent', 0) and 'Perfect-Moves' in tables:
+        return play_move_perfect(tables, which_player, state)
+    if has_ai_moves(tables, game_parameters):
+        return play_move_precomputed(tables, which_player, state, game_parameters)
+    return play_move_ai(tables['Boards'][which_player - 1][state], depth, which_player,
+                        generate_board(tables['Boards'][which_player - 1][state], game_parameters),
+                        number_of_moves, which_player, game_parameters)
+
+
 def learn_model(model_first: bool, game_parameters: Dict,
                 tables: Dict, iterations: int) -> None:
     """
@@ -111,6 +127,74 @@ def learn_model(model_first: bool, game_parameters: Dict,
     :return:
     """
     work_tables = copy.deepcopy(tables)
+    run_learning(model_first, game_parameters, work_tables, iterations)
+
+    if model_first:
+        which_player = 0
+    else:
+        which_player = 1
+    save_dict = {key: work_tables[key][which_player] for key in work_tables}
+    if which_player == 0:
+        save_tables(save_dict, game_parameters['Updated_table_1'], game_parameters, 1)
+    else:
+        save_tables(save_dict, game_parameters['Updated_table_2'], game_parameters, 1)
+
+
+def learn_model_shared(model_first: bool, game_parameters: Dict,
+                       description: Dict, iterations: int) -> None:
+    """
+    learn_model, which updates q-table of the model in shared memory (sharedSystem.share_tables),
+    models of both players write to different q-tables, so they can learn at the same time
+    :param model_first: is model playing first or not
+    :param game_parameters: parameters of the game
+    :param description: description of shared tables
+    :param iterations: how many iterations of learning
+    :return:
+    """
+    tables, blocks = attach_tables(description)
+    run_learning(model_first, game_parameters, tables, iterations)
+    tables = None
+    release_tables(blocks)
+
+
+def learn_model_worker(model_first: bool, game_parameters: Dict, description: Dict, iterations: int,
+                       seed: np.random.SeedSequence) -> None:
+    """
+    learn_model_shared for one of many workers of the model - workers update the same q-table without locks,
+    so every worker needs its own stream of random numbers, forked processes would play the same games otherwise
+    :param model_first: is model playing first or not
+    :param game_parameters: parameters of the game
+    :param description: description of shared tables
+    :param iterations: how many iterations of learning of this worker
+    :param seed: seed of random numbers of this worker
+    :return:
+    """
+    random.seed(int(seed.generate_state(1, np.uint64)[0]))
+    np.random.seed(seed.generate_state(4))
+    learn_model_shared(model_first, game_parameters, description, iterations)
+
+
+def split_iterations(iterations: int, workers: int) -> List[int]:
+    """
+    :param iterations: how many iterations of learning
+    :param workers: how many workers
+    :return: iterations of every worker
+    """
+    return [iterations // workers + (1 if i < iterations % workers else 0) for i in range(0, workers)]
+
+
+def run_learning(model_first: bool, game_parameters: Dict,
+                 work_tables: Dict, iterations: int) -> None:
+    """
+    :param model_first: is model playing first or not
+    :param game_parameters: parameters of the game
+    :param work_tables: tables, q-table of the model is updated in place
+    :param iterations: how many iterations of learning
+    :return:
+    """
+    if game_parameters.get('batch_size', 0) > 0:
+        run_learning_batched(model_first, game_parameters, work_tables, iterations)
+        return
     max_moves = game_parameters['max_n_moves']
     ten_percentage = iterations / 10
     percentage = 0
@@ -119,43 +203,22 @@ def learn_model(model_first: bool, game_parameters: Dict,
         number_of_moves = 0
         is_random_agent = random_agent(game_parameters, model_first)
         state = return_first_state(work_tables, game_parameters)
-        while not is_ending_state(work_tables['Prizes'][which_player - 1][state],
-                                  game_parameters) and number_of_moves < max_moves:
+        while not work_tables['Terminals'][which_player - 1][state] and number_of_moves < max_moves:
             if which_player == 1:
                 if model_first:
                     state = train_model(work_tables, which_player,
                                         state, game_parameters)
                 else:
-                    if is_random_agent:
-                        moves = available_moves(generate_board(work_tables['Boards'][which_player - 1][state],
-                                                               game_parameters),
-                                                game_parameters['size_y'], game_parameters['size_x'])
-                        np.random.shuffle(moves)
-                        move = moves[0]
-                    else:
-                        move = play_move_ai(work_tables['Boards'][which_player - 1][state],
-                                            game_parameters['depth_2'], which_player,
-                                            generate_board(work_tables['Boards'][which_player - 1][state],
-                                                           game_parameters),
-                                            number_of_moves, which_player, game_parameters)
+                    move = play_move_opponent(work_tables, which_player, state, number_of_moves,
+                                              is_random_agent, game_parameters['depth_2'], game_parameters)
                     state = work_tables['States'][which_player - 1][state][move]
             else:
                 if not model_first:
                     state = train_model(work_tables, which_player,
                                         state, game_parameters)
                 else:
-                    if is_random_agent:
-                        moves = available_moves(generate_board(work_tables['Boards'][which_player - 1][state],
-                                                               game_parameters),
-                                                game_parameters['size_y'], game_parameters['size_x'])
-                        np.random.shuffle(moves)
-                        move = moves[0]
-                    else:
-                        move = play_move_ai(work_tables['Boards'][which_player - 1][state],
-                                            game_parameters['depth_1'], which_player,
-                                            generate_board(work_tables['Boards'][which_player - 1][state],
-                                                           game_parameters),
-                                            number_of_moves, which_player, game_parameters)
+                    move = play_move_opponent(work_tables, which_player, state, number_of_moves,
+                                              is_random_agent, game_parameters['depth_1'], game_parameters)
                     state = work_tables['States'][which_player - 1][state][move]
 
             number_of_moves += 1
@@ -168,40 +231,642 @@ def learn_model(model_first: bool, game_parameters: Dict,
             else:
                 print("Second model: " + str(percentage) + " %")
 
-    if model_first:
-        which_player = 0
+
+def masked_argmax(values: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+    """
+    :param values: array N x size_x
+    :param allowed: bool array N x size_x - every row has at least one allowed move
+    :return: allowed move with the biggest value in every row, the first one of equal moves
+    """
+    return np.argmax(np.where(allowed, values, -np.inf), axis=1)
+
+
+def random_moves(allowed: np.ndarray) -> np.ndarray:
+    """
+    :param allowed: bool array N x size_x - every row has at least one allowed move
+    :return: uniformly drawn allowed move in every row
+    """
+    return masked_argmax(np.random.random_sample(allowed.shape), allowed)
+
+
+def return_next_max_many(tables: Dict, which_player: int, next_states: np.ndarray,
+                         game_parameters: Dict) -> np.ndarray:
+    """
+    return_next_max for many states at once
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who played moves
+    :param next_states: next states of the opponent
+    :param game_parameters: parameters of the game
+    :return: next q-max of every state
+    """
+    opponent = which_player % 2
+    prizes = np.asarray(tables['Prizes'][opponent][next_states])
+    actions = np.argmax(prizes, axis=1)
+    after = np.asarray(tables['States'][opponent][next_states, actions])
+    max_values = np.asarray(tables['Q-Tables'][which_player - 1][after]).max(axis=1)
+    return np.where(np.asarray(tables['Winners'][opponent][next_states]) != 0, game_parameters['win_prize'],
+                    np.where(tables['Draws'][opponent][next_states], game_parameters['draw_prize'], max_values))
+
+
+def choose_moves(tables: Dict, which_player: int, states: np.ndarray, game_parameters: Dict) -> np.ndarray:
+    """
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who is going to move
+    :param states: states, in which model is currently
+    :param game_parameters: parameters of the game
+    :return: epsilon-greedy moves of the model
+    """
+    allowed = np.asarray(tables['States'][which_player - 1][states]) != -1
+    return np.where(np.random.random_sample(len(states)) <= game_parameters['epsilon'], random_moves(allowed),
+                    masked_argmax(np.asarray(tables['Q-Tables'][which_player - 1][states]), allowed))
+
+
+def update_q_table(tables: Dict, which_player: int, states: np.ndarray, actions: np.ndarray,
+                   targets: np.ndarray, game_parameters: Dict) -> None:
+    """
+    every pair (state, action) is updated once with the mean of its targets
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who played moves
+    :param states: states, in which moves were played
+    :param actions: played moves
+    :param targets: rewards and discounted next q-max of moves
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    q_table = tables['Q-Tables'][which_player - 1]
+    pairs, inverse = np.unique(np.asarray(states, dtype=np.int64) * game_parameters['size_x'] + actions,
+                               return_inverse=True)
+    means = np.bincount(inverse, weights=targets) / np.bincount(inverse)
+    rows = pairs // game_parameters['size_x']
+    columns = pairs % game_parameters['size_x']
+    q_table[rows, columns] = (1 - game_parameters['alpha']) * q_table[rows, columns] + \
+        game_parameters['alpha'] * means
+
+
+def train_model_many(tables: Dict, which_player: int, states: np.ndarray, game_parameters: Dict) -> np.ndarray:
+    """
+    train_model for many games at once - moves are chosen epsilon-greedy, then every visited pair
+    (state, action) is updated once with the mean of targets of games, which visited it
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who played moves
+    :param states: states, in which model is currently
+    :param game_parameters: parameters of the game
+    :return: next states
+    """
+    seat = which_player - 1
+    actions = choose_moves(tables, which_player, states, game_parameters)
+    next_states = np.asarray(tables['States'][seat][states, actions])
+    targets = np.asarray(tables['Prizes'][seat][states, actions]) + \
+        game_parameters['gamma'] * return_next_max_many(tables, which_player, next_states, game_parameters)
+    update_q_table(tables, which_player, states, actions, targets, game_parameters)
+    return next_states
+
+
+def play_moves_opponent(tables: Dict, which_player: int, states: np.ndarray, number_of_moves: int,
+                        is_random_agent: np.ndarray, depth: int, game_parameters: Dict) -> np.ndarray:
+    """
+    play_move_opponent for many games at once - random, perfect and precomputed moves are chosen
+    for all games together, moves of the alpha-beta search are still searched game by game
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who is going to move
+    :param states: indexes of states
+    :param number_of_moves: how many moves played
+    :param is_random_agent: is opponent choosing moves randomly in every game
+    :param depth: depth of the alpha-beta search
+    :param game_parameters: parameters of the game
+    :return: moves of the opponent
+    """
+    seat = which_player - 1
+    moves = random_moves(np.asarray(tables['States'][seat][states]) != -1)
+    other = np.nonzero(~is_random_agent)[0]
+    if len(other) == 0:
+        return moves
+    if game_parameters.get('perfect_opponent', 0) and 'Perfect-Moves' in tables:
+        moves[other] = tables['Perfect-Moves'][seat][states[other]]
+    elif has_ai_moves(tables, game_parameters):
+        move_sets = np.asarray(tables['AI-Move-Sets'][seat][states[other]]).astype(np.int64)
+        in_set = (move_sets[:, None] >> np.arange(0, game_parameters['size_x'])) & 1 == 1
+        # like play_move_precomputed, sets with less than two moves are replaced with 'AI-Moves'
+        single = in_set.sum(axis=1) <= 1
+        moves[other] = np.where(single, tables['AI-Moves'][seat][states[other]],
+                                random_moves(in_set | single[:, None]))
     else:
+        for i in other:
+            moves[i] = play_move_opponent(tables, which_player, int(states[i]), number_of_moves, False, depth,
+                                          game_parameters)
+    return moves
+
+
+def run_learning_batched(model_first: bool, game_parameters: Dict,
+                         work_tables: Dict, iterations: int) -> None:
+    """
+    run_learning, which plays batch_size games in lockstep - states of all games are kept in one array
+    and every move of the model or of the opponent is chosen for all running games at once
+    :param model_first: is model playing first or not
+    :param game_parameters: parameters of the game
+    :param work_tables: tables, q-table of the model is updated in place
+    :param iterations: how many iterations of learning
+    :return:
+    """
+    max_moves = game_parameters['max_n_moves']
+    batch_size = game_parameters['batch_size']
+    first_state = return_first_state(work_tables, game_parameters)
+    model_player = 1 if model_first else 2
+    random_moves_key = 'random_moves2' if model_first else 'random_moves1'
+    depth = game_parameters['depth_1'] if model_first else game_parameters['depth_2']
+    played = 0
+    percentage = 0
+    while played < iterations:
+        how_many = min(batch_size, iterations - played)
+        states = np.full(how_many, first_state, dtype=np.int64)
+        is_random_agent = np.random.random_sample(how_many) <= game_parameters[random_moves_key]
+        running = np.arange(0, how_many)
         which_player = 1
-    save_dict = {"States": work_tables['States'][which_player], "Q-Tables": work_tables['Q-Tables'][which_player],
-                 "Prizes": work_tables['Prizes'][which_player], "Boards": work_tables['Boards'][which_player]}
-    if which_player == 0:
-        save_tables(save_dict, game_parameters['Updated_table_1'], game_parameters, 1)
-    else:
-        save_tables(save_dict, game_parameters['Updated_table_2'], game_parameters, 1)
+        number_of_moves = 0
+        while number_of_moves < max_moves:
+            running = running[~np.asarray(work_tables['Terminals'][which_player - 1][states[running]])]
+            if len(running) == 0:
+                break
+            if which_player == model_player:
+                states[running] = train_model_many(work_tables, which_player, states[running], game_parameters)
+            else:
+                moves = play_moves_opponent(work_tables, which_player, states[running], number_of_moves,
+                                            is_random_agent[running], depth, game_parameters)
+                states[running] = work_tables['States'][which_player - 1][states[running], moves]
+            number_of_moves += 1
+            which_player = (which_player % 2) + 1
+        played += how_many
+        while percentage + 10 <= played * 100 // iterations:
+            percentage += 10
+            if model_first:
+                print("First model: " + str(percentage) + " %")
+            else:
+                print("Second model: " + str(percentage) + " %")
+
+
+def run_self_play(game_parameters: Dict, tables: Dict, iterations: int) -> int:
+    """
+    run_learning_batched, in which both models choose moves with their own q-tables and learn in the same games,
+    so every simulated move updates a q-table, a part of games (opponent_games, default 0) is still played
+    by one of models against the opponent of play_moves_opponent, which takes a random seat
+    :param game_parameters: parameters of the game
+    :param tables: tables, q-tables of both models are updated in place
+    :param iterations: how many games
+    :return: how many moves were played
+    """
+    max_moves = game_parameters['max_n_moves']
+    batch_size = game_parameters.get('batch_size', 0) or 256
+    first_state = return_first_state(tables, game_parameters)
+    played = 0
+    percentage = 0
+    simulated = 0
+    while played < iterations:
+        how_many = min(batch_size, iterations - played)
+        states = np.full(how_many, first_state, dtype=np.int64)
+        # 0 - both seats learn, otherwise seat of the opponent
+        opponent_seats = np.where(np.random.random_sample(how_many) < game_parameters.get('opponent_games', 0),
+                                  np.random.randint(1, 3, how_many), 0)
+        is_random_agent = np.where(opponent_seats == 1,
+                                   np.random.random_sample(how_many) <= game_parameters['random_moves1'],
+                                   np.random.random_sample(how_many) <= game_parameters['random_moves2'])
+        running = np.arange(0, how_many)
+        which_player = 1
+        number_of_moves = 0
+        while number_of_moves < max_moves:
+            running = running[~np.asarray(tables['Terminals'][which_player - 1][states[running]])]
+            if len(running) == 0:
+                break
+            learning = running[opponent_seats[running] != which_player]
+            opponent = running[opponent_seats[running] == which_player]
+            if len(learning):
+                states[learning] = train_model_many(tables, which_player, states[learning], game_parameters)
+            if len(opponent):
+                depth = game_parameters['depth_1'] if which_player == 2 else game_parameters['depth_2']
+                moves = play_moves_opponent(tables, which_player, states[opponent], number_of_moves,
+                                            is_random_agent[opponent], depth, game_parameters)
+                states[opponent] = tables['States'][which_player - 1][states[opponent], moves]
+            simulated += len(running)
+            number_of_moves += 1
+            which_player = (which_player % 2) + 1
+        played += how_many
+        while percentage + 10 <= played * 100 // iterations:
+            percentage += 10
+            print("Self-play: " + str(percentage) + " %")
+    return simulated
+
+
+def train_self_play(game_parameters: Dict, tables: Dict, iterations: int) -> None:
+    """
+    trains both models with run_self_play on a copy of q-tables in memory, tables may be mapped
+    from the directory of Updated_tables, which is replaced when updated tables are saved
+    :param game_parameters: parameters of the game
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param iterations: how many games
+    :return:
+    """
+    tables = dict(tables)
+    tables['Q-Tables'] = [np.array(tables['Q-Tables'][i], dtype=float) for i in range(0, 2)]
+    simulated = run_self_play(game_parameters, tables, iterations)
+    print("Moves: " + str(simulated))
+    save_tables(tables, game_parameters['Updated_tables'], game_parameters)
+
+
+def play_episodes(model_first: bool, game_parameters: Dict, tables: Dict, how_many: int,
+                  first_state: int) -> np.ndarray:
+    """
+    games of run_learning_batched, in which the model chooses moves with its q-table, but does not learn
+    :param model_first: is model playing first or not
+    :param game_parameters: parameters of the game
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param how_many: how many games
+    :param first_state: index of the first state
+    :return: moves of the model as distributedSystem.TRANSITION
+    """
+    model_player = 1 if model_first else 2
+    random_moves_key = 'random_moves2' if model_first else 'random_moves1'
+    depth = game_parameters['depth_1'] if model_first else game_parameters['depth_2']
+    states = np.full(how_many, first_state, dtype=np.int64)
+    is_random_agent = np.random.random_sample(how_many) <= game_parameters[random_moves_key]
+    running = np.arange(0, how_many)
+    transitions = []
+    which_player = 1
+    number_of_moves = 0
+    while number_of_moves < game_parameters['max_n_moves']:
+        running = running[~np.asarray(tables['Terminals'][which_player - 1][states[running]])]
+        if len(running) == 0:
+            break
+        if which_player == model_player:
+            moves = choose_moves(tables, which_player, states[running], game_parameters)
+        else:
+            moves = play_moves_opponent(tables, which_player, states[running], number_of_moves,
+                                        is_random_agent[running], depth, game_parameters)
+        next_states = tables['States'][which_player - 1][states[running], moves]
+        if which_player == model_player:
+            played = np.zeros(len(running), dtype=TRANSITION)
+            played['seat'] = which_player - 1
+            played['action'] = moves
+            played['state'] = states[running]
+            played['next_state'] = next_states
+            played['reward'] = tables['Prizes'][which_player - 1][states[running], moves]
+            transitions.append(played)
+        states[running] = next_states
+        number_of_moves += 1
+        which_player = (which_player % 2) + 1
+    return np.concatenate(transitions) if transitions else np.zeros(0, dtype=TRANSITION)
+
+
+def run_actor(game_parameters: Dict, tables: Dict, address) -> None:
+    """
+    actor of train_actor_learner - plays batch_size (256) games of one model with the last q-tables received
+    from the learner, sends moves of the model to the learner and gets newer q-tables in the answer,
+    until the learner sends STOP, it can run on another machine (training=actor learner_address=host:port)
+    :param game_parameters: parameters of the game
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param address: address of the learner
+    :return:
+    """
+    connection = connect_actor(address, game_parameters.get('authkey', "MUM"))
+    tables = dict(tables)
+    shapes = [np.shape(tables['Q-Tables'][i]) for i in range(0, 2)]
+    how_many = game_parameters.get('batch_size', 0) or 256
+    first_state = return_first_state(tables, game_parameters)
+    known = STOP
+    model_first = True
+    connection.send_bytes(pack_transitions(known, 0, np.zeros(0, dtype=TRANSITION)))
+    version, q_tables = unpack_snapshot(connection.recv_bytes(), shapes)
+    while version != STOP:
+        if q_tables is not None:
+            tables['Q-Tables'] = q_tables
+            known = version
+        transitions = play_episodes(model_first, game_parameters, tables, how_many, first_state)
+        connection.send_bytes(pack_transitions(known, how_many, transitions))
+        version, q_tables = unpack_snapshot(connection.recv_bytes(), shapes)
+        model_first = not model_first
+    connection.close()
+
+
+def run_actor_worker(game_parameters: Dict, tables: Dict, address, seed: np.random.SeedSequence) -> None:
+    """
+    run_actor in a local process with its own stream of random numbers (like learn_model_worker)
+    :param game_parameters: parameters of the game
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param address: address of the learner
+    :param seed: seed of random numbers of this actor
+    :return:
+    """
+    random.seed(int(seed.generate_state(1, np.uint64)[0]))
+    np.random.seed(seed.generate_state(4))
+    run_actor(game_parameters, tables, address)
+
+
+def train_actor_learner(game_parameters: Dict, tables: Dict, iterations: int) -> None:
+    """
+    trains both models with actors (run_actor), which play games and send moves of models over sockets
+    to this process - the learner, which updates q-tables like train_model_many, and after every sync_steps
+    (10000) updates makes a new version of q-tables, which is sent to actors with the next answer,
+    learner listens on learner_address ("localhost:0" - any free port, or a path of a Unix socket) and waits
+    accept_timeout (60) seconds for actors (process_number(process_percent)) connections, local_actors
+    (all of them) are started here and waiting stops also, when one of them ends before connecting,
+    it stops actors after iterations games of every model, prints throughput and staleness of moves
+    (how many versions older were q-tables of the actor) and saves updated tables
+    :param game_parameters: parameters of the game
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param iterations: how many iterations of learning
+    :return:
+    """
+    actors = game_parameters.get('actors', process_number(game_parameters.get('process_percent', 0)))
+    local_actors = game_parameters.get('local_actors', actors)
+    sync_steps = game_parameters.get('sync_steps', 10000)
+    listener = open_learner(game_parameters.get('learner_address', "localhost:0"),
+                            game_parameters.get('authkey', "MUM"))
+    print("Learner: " + str(listener.address))
+    seeds = np.random.SeedSequence(game_parameters.get('seed')).spawn(local_actors)
+    processes = [mp.Process(target=run_actor_worker, args=(game_parameters, tables, listener.address, seeds[i]))
+                 for i in range(0, local_actors)]
+    for process in processes:
+        process.start()
+
+    def stop_actors() -> None:
+        for actor in processes:
+            actor.terminate()
+            actor.join()
+
+    try:
+        connections = accept_actors(listener, actors, game_parameters.get('authkey', "MUM"),
+                                    game_parameters.get('accept_timeout', 60),
+                                    lambda: all(actor.exitcode is None for actor in processes), stop_actors)
+    finally:
+        listener.close()
+
+    tables = dict(tables)
+    tables['Q-Tables'] = [np.array(tables['Q-Tables'][i], dtype=float) for i in range(0, 2)]
+    version = 0
+    steps = 0
+    synced = 0
+    episodes = 0
+    staleness = []
+    t0 = time.time()
+    while connections:
+        for connection in wait(connections):
+            known, played, transitions = unpack_transitions(connection.recv_bytes())
+            episodes += played
+            if len(transitions):
+                staleness.append(np.full(len(transitions), version - known))
+                for seat in range(0, 2):
+                    moves = transitions[transitions['seat'] == seat]
+                    if len(moves) == 0:
+                        continue
+                    next_states = moves['next_state'].astype(np.int64)
+                    targets = moves['reward'] + game_parameters['gamma'] * \
+                        return_next_max_many(tables, seat + 1, next_states, game_parameters)
+                    update_q_table(tables, seat + 1, moves['state'], moves['action'], targets, game_parameters)
+                steps += len(transitions)
+                if steps - synced >= sync_steps:
+                    version += 1
+                    synced = steps
+            if episodes >= 2 * iterations:
+                connection.send_bytes(pack_snapshot(STOP))
+                connection.close()
+                connections.remove(connection)
+            else:
+                connection.send_bytes(pack_snapshot(version, tables['Q-Tables'] if known < version else None))
+    t1 = time.time()
+    for process in processes:
+        process.join()
+    if any(process.exitcode != 0 for process in processes):
+        raise RuntimeError("Actor failed")
+    staleness = np.concatenate(staleness) if staleness else np.zeros(1)
+    print("Episodes per second: " + str(episodes / (t1 - t0)))
+    print("Updates per second: " + str(steps / (t1 - t0)))
+    print("Staleness: mean " + str(float(staleness.mean())) + ", max " + str(int(staleness.max())) +
+          " of " + str(version) + " versions")
+    append_to_csv("time_data.csv", [t1 - t0, "ActorLearner", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    save_tables(tables, game_parameters['Updated_tables'], game_parameters)
+
+
+def sweep_q_tables(tables: Dict, plies: List[np.ndarray], game_parameters: Dict) -> float:
+    """
+    one sweep of Bellman updates of train_model with alpha = 1 over every allowed move of every state,
+    from the last ply to the first one, so targets of every ply use already updated q-values
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param plies: for every ply indexes of not ending states of the player, who moves in it
+    :param game_parameters: parameters of the game
+    :return: the biggest change of a q-value
+    """
+    delta = 0.0
+    for ply in range(len(plies) - 1, -1, -1):
+        seat = ply % 2
+        index = plies[ply]
+        if len(index) == 0:
+            continue
+        next_states = np.asarray(tables['States'][seat][index])
+        rows, actions = np.nonzero(next_states != -1)
+        states = index[rows]
+        targets = np.asarray(tables['Prizes'][seat][states, actions]) + game_parameters['gamma'] * \
+            return_next_max_many(tables, seat + 1, next_states[rows, actions], game_parameters)
+        delta = max(delta, float(np.abs(targets - tables['Q-Tables'][seat][states, actions]).max()))
+        tables['Q-Tables'][seat][states, actions] = targets
+    return delta
+
+
+def train_value_iteration(game_parameters: Dict, tables: Dict) -> None:
+    """
+    trains both models by sweeping over all states (sweep_q_tables) until the biggest change of a q-value
+    is smaller than sweep_tolerance (1e-9) or after max_sweeps (100) sweeps, then saves updated tables
+    :param game_parameters: parameters of the game
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :return:
+    """
+    tables = dict(tables)
+    tables['Q-Tables'] = [np.array(tables['Q-Tables'][i], dtype=float) for i in range(0, 2)]
+    plies = []
+    for ply in range(0, game_parameters['size_x'] * game_parameters['size_y'] + 1):
+        boards = np.asarray(tables['Boards'][ply % 2])
+        on_ply = np.count_nonzero(boards.reshape(len(boards), -1), axis=1) == ply
+        plies.append(np.nonzero(on_ply & ~np.asarray(tables['Terminals'][ply % 2]))[0])
+    for sweep in range(1, game_parameters.get('max_sweeps', 100) + 1):
+        delta = sweep_q_tables(tables, plies, game_parameters)
+        print("Sweep " + str(sweep) + ": " + str(delta))
+        if delta < game_parameters.get('sweep_tolerance', 1e-9):
+            break
+    save_tables(tables, game_parameters['Updated_tables'], game_parameters)
+
+
+def prepare_predecessors(tables: Dict, seat: int,
+                         game_parameters: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    q-value of the move (state, action) depends only on q-values of the state of the same player after the answer
+    of the opponent, which is chosen like in return_next_max, so it has to be updated again, when they change
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param seat: 0 for the first player, 1 for the second one
+    :param game_parameters: parameters of the game
+    :return: states after the answer of the opponent (-1 for not allowed moves and moves ending the game),
+    the part of targets, which does not depend on q-values, and the predecessor index - offsets and moves
+    (state * size_x + action) sorted by the state after the answer
+    """
+    size_x = game_parameters['size_x']
+    opponent = 1 - seat
+    next_states = np.asarray(tables['States'][seat]).reshape(-1, size_x).astype(np.int64)
+    legal = next_states != -1
+    safe_next = np.where(legal, next_states, 0)
+    wins = np.asarray(tables['Winners'][opponent])[safe_next] != 0
+    draws = np.asarray(tables['Draws'][opponent])[safe_next].astype(bool)
+    actions = np.argmax(np.asarray(tables['Prizes'][opponent])[safe_next], axis=2)
+    after = np.where(legal & ~wins & ~draws, np.asarray(tables['States'][opponent])[safe_next, actions], -1)
+    fixed = np.asarray(tables['Prizes'][seat], dtype=float) + game_parameters['gamma'] * \
+        np.where(wins, game_parameters['win_prize'], np.where(draws, game_parameters['draw_prize'], 0))
+    moves = np.nonzero(after.reshape(-1) != -1)[0]
+    order = np.argsort(after.reshape(-1)[moves], kind="stable")
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(after.reshape(-1)[moves], minlength=len(after)))))
+    return after, fixed, offsets, moves[order]
+
+
+def train_prioritized_sweeping(game_parameters: Dict, tables: Dict) -> int:
+    """
+    trains both models with updates of train_model, but without playing games - moves are taken from a heap
+    ordered by the Bellman error, and after every update, which changes the best q-value of a state, errors
+    of moves leading to this state (prepare_predecessors) are pushed to the heap,
+    the heap keeps at most queue_size (2^20) moves with the biggest errors, updates stop when no error is
+    bigger than priority_tolerance (by default 1 % of the biggest absolute prize) or after max_updates
+    (0 - no limit), or when models keep the value of target_accuracy part of states (validate_models_exact,
+    only for solved tables, checked every 10000 updates), updates_per_second (0 - no limit) limits how fast
+    they are made, then updated tables are saved
+    :param game_parameters: parameters of the game
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :return: number of updates
+    """
+    size_x = game_parameters['size_x']
+    alpha = game_parameters['alpha']
+    gamma = game_parameters['gamma']
+    prize_range = max([abs(game_parameters['win_prize']), abs(game_parameters['draw_prize'])] +
+                      [float(np.abs(np.asarray(tables['Prizes'][i])).max(initial=0)) for i in range(0, 2)])
+    tolerance = game_parameters.get('priority_tolerance', 0.01 * prize_range)
+    target_accuracy = game_parameters.get('target_accuracy', 0) if 'Optimal-Moves' in tables else 0
+    queue_size = game_parameters.get('queue_size', 2 ** 20)
+    max_updates = game_parameters.get('max_updates', 0)
+    updates_per_second = game_parameters.get('updates_per_second', 0)
+    tables = dict(tables)
+    tables['Q-Tables'] = [np.array(tables['Q-Tables'][i], dtype=float) for i in range(0, 2)]
+    q_tables = tables['Q-Tables']
+    successors = [prepare_predecessors(tables, i, game_parameters) for i in range(0, 2)]
+
+    heap = []
+    for i in range(0, 2):
+        after, fixed, _, _ = successors[i]
+        targets = fixed + gamma * np.where(after != -1, q_tables[i].max(axis=1)[after], 0)
+        errors = np.where(np.asarray(tables['States'][i]) != -1, np.abs(targets - q_tables[i]), 0).reshape(-1)
+        moves = np.nonzero(errors > tolerance)[0]
+        if len(moves) > queue_size:
+            moves = moves[np.argpartition(-errors[moves], queue_size)[:queue_size]]
+        heap.extend(zip((-errors[moves]).tolist(), [i] * len(moves), moves.tolist()))
+    heapq.heapify(heap)
+
+    def return_error(seat: int, move: int) -> float:
+        state, action = divmod(move, size_x)
+        after_state = successors[seat][0][state, action]
+        target = successors[seat][1][state, action]
+        if after_state != -1:
+            target += gamma * q_tables[seat][after_state].max()
+        return target - q_tables[seat][state, action]
+
+    updates = 0
+    t0 = time.time()
+    while heap and (max_updates == 0 or updates < max_updates):
+        _, seat, move = heapq.heappop(heap)
+        error = return_error(seat, move)
+        if abs(error) <= tolerance:
+            continue
+        state, action = divmod(move, size_x)
+        old_max = q_tables[seat][state].max()
+        q_tables[seat][state, action] += alpha * error
+        updates += 1
+        if abs(error) * (1 - alpha) > tolerance:
+            heapq.heappush(heap, (-abs(error) * (1 - alpha), seat, move))
+        if q_tables[seat][state].max() != old_max:
+            offsets, predecessors = successors[seat][2], successors[seat][3]
+            for predecessor in predecessors[offsets[state]:offsets[state + 1]].tolist():
+                predecessor_error = abs(return_error(seat, predecessor))
+                if predecessor_error > tolerance:
+                    heapq.heappush(heap, (-predecessor_error, seat, predecessor))
+        if len(heap) > 2 * queue_size:
+            heap = heapq.nsmallest(queue_size, heap)
+        if updates_per_second and updates % 1000 == 0:
+            time.sleep(max(0.0, updates / updates_per_second - (time.time() - t0)))
+        if target_accuracy and updates % 10000 == 0 and \
+                validate_models_exact(game_parameters, tables)['optimal'] >= target_accuracy:
+            break
+    print("Updates: " + str(updates))
+    save_tables(tables, game_parameters['Updated_tables'], game_parameters)
+    return updates
 
 
 def train_both_models(game_parameters: Dict, iterations: int,
                       tables: Dict) -> None:
     """
-    function for running both models simultaneously - after that, it is saving updated tables as json file
+    function for running both models simultaneously - after that, it is saving updated tables as json file,
+    with training=sweep both models are trained by train_value_iteration instead of playing games,
+    with training=prioritized by train_prioritized_sweeping, with training=distributed by train_actor_learner,
+    with training=actor this process is only an actor of the learner at learner_address (run_actor),
+    with training=selfplay both models learn in the same iterations games (train_self_play),
+    with game_parameters['shared_tables'] (default 1) models learn on one copy of tables in shared memory
+    and updated tables are saved once, otherwise every model saves its own file, which are merged then,
+    shared tables are trained by process_number(process_percent) workers, half of them for every model,
+    which split iterations and update q-tables without locks (seed=... makes their random numbers repeatable)
     :param game_parameters: parameters of the game
     :param iterations: how many iterations of learning
     :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
     :return:
     """
+    if game_parameters.get('training', "episodes") == "sweep":
+        train_value_iteration(game_parameters, tables)
+        return
+    if game_parameters.get('training', "episodes") == "prioritized":
+        train_prioritized_sweeping(game_parameters, tables)
+        return
+    if game_parameters.get('training', "episodes") == "distributed":
+        train_actor_learner(game_parameters, tables, iterations)
+        return
+    if game_parameters.get('training', "episodes") == "actor":
+        run_actor(game_parameters, tables, game_parameters['learner_address'])
+        return
+    if game_parameters.get('training', "episodes") == "selfplay":
+        train_self_play(game_parameters, tables, iterations)
+        return
+    if game_parameters.get('shared_tables', 1):
+        workers = max(process_number(game_parameters.get('process_percent', 0)) // 2, 1)
+        seeds = np.random.SeedSequence(game_parameters.get('seed')).spawn(2 * workers)
+        description, blocks = share_tables(tables)
+        try:
+            processes = []
+            for model_first in [True, False]:
+                for worker_iterations in split_iterations(iterations, workers):
+                    processes.append(mp.Process(target=learn_model_worker,
+                                                args=(model_first, game_parameters, description, worker_iterations,
+                                                      seeds[len(processes)])))
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            if any(process.exitcode != 0 for process in processes):
+                raise RuntimeError("Learning of a model failed")
+            shared_tables, attached_blocks = attach_tables(description)
+            save_tables(shared_tables, game_parameters['Updated_tables'], game_parameters)
+            shared_tables = None
+            release_tables(attached_blocks)
+        finally:
+            release_tables(blocks, True)
+        return
     process1 = mp.Process(target=learn_model, args=(True, game_parameters, tables, iterations))
     process2 = mp.Process(target=learn_model, args=(False, game_parameters, tables, iterations))
     process1.start()
     process2.start()
     process1.join()
     process2.join()
-    first_dict = read_tables(game_parameters['Updated_table_1'], game_parameters)
-    second_dict = read_tables(game_parameters['Updated_table_2'], game_parameters)
-    to_save_dict = {"States": [first_dict['States'], second_dict['States']],
-                    "Q-Tables": [first_dict['Q-Tables'], second_dict['Q-Tables']],
-                    "Prizes": [first_dict['Prizes'], second_dict['Prizes']],
-                    "Boards": [first_dict['Boards'], second_dict['Boards']]}
-    save_tables(convert_dict_read(to_save_dict), game_parameters['Updated_tables'], game_parameters)
+    first_dict = read_tables(game_parameters['Updated_table_1'], game_parameters, 1)
+    second_dict = read_tables(game_parameters['Updated_table_2'], game_parameters, 1)
+    to_save_dict = {key: [first_dict[key], second_dict[key]] for key in first_dict}
+    save_tables(to_save_dict, game_parameters['Updated_tables'], game_parameters)
 
 
 def validate_models(game_parameters: Dict, tables: Dict,
@@ -209,38 +874,44 @@ def validate_models(game_parameters: Dict, tables: Dict,
                     states2: List[int], moves_to_make2: List[int]) -> float:
     counter = 0
     for i in range(0, len(states1)):
-        moves = available_moves(generate_board(tables['Boards'][0][states1[i]],
-                                               game_parameters), game_parameters['size_y'],
-                                game_parameters['size_x'])
-        action = moves[0]
-        max_value = tables['Q-Tables'][0][states1[i]][action]
-        for j in range(0, game_parameters['size_x']):
-            if tables['Q-Tables'][0][states1[i]][j] > max_value and \
-                    tables['States'][0][states1[i]][j] != - 1:
-                max_value = tables['Q-Tables'][0][states1[i]][j]
-                action = j
-
-        if action == moves_to_make1[i]:
+        if play_move_model(tables, 1, states1[i], game_parameters) == moves_to_make1[i]:
             counter += 1
 
     for i in range(0, len(states2)):
-        moves = available_moves(generate_board(tables['Boards'][1][states2[i]],
-                                               game_parameters), game_parameters['size_y'],
-                                game_parameters['size_x'])
-        action = moves[0]
-        max_value = tables['Q-Tables'][1][states2[i]][action]
-        for j in range(0, game_parameters['size_x']):
-            if tables['Q-Tables'][1][states2[i]][j] > max_value and \
-                    tables['States'][1][states2[i]][j] != - 1:
-                max_value = tables['Q-Tables'][1][states2[i]][j]
-                action = j
-
-        if action == moves_to_make2[i]:
+        if play_move_model(tables, 2, states2[i], game_parameters) == moves_to_make2[i]:
             counter += 1
 
     return counter / (len(states1) + len(states2))
 
 
+def validate_models_exact(game_parameters: Dict, tables: Dict) -> Dict:
+    """
+    compares moves of both models with solved tables (solverSystem.solve_tables) in all states, which are not ending
+    :param game_parameters: parameters of the game
+    :param tables: dict, which contains solved tables
+    :return: part of states, in which model keeps the value of the state ("optimal") and plays like the perfect
+    player ("perfect"), for every model and for both of them
+    """
+    results = {}
+    counters = [0, 0, 0]
+    for i in range(0, 2):
+        states = np.asarray(tables['States'][i]).reshape(-1, game_parameters['size_x'])
+        legal = states != -1
+        not_ending = legal.any(axis=1)
+        q_values = np.where(legal, np.asarray(tables['Q-Tables'][i], dtype=float), -np.inf)[not_ending]
+        actions = np.argmax(q_values, axis=1)
+        optimal = (np.asarray(tables['Optimal-Moves'][i])[not_ending] >> actions) & 1
+        perfect = np.asarray(tables['Perfect-Moves'][i])[not_ending] == actions
+        results["optimal_" + str(i + 1)] = float(optimal.mean()) if len(actions) else 0.0
+        results["perfect_" + str(i + 1)] = float(perfect.mean()) if len(actions) else 0.0
+        counters[0] += len(actions)
+        counters[1] += int(optimal.sum())
+        counters[2] += int(perfect.sum())
+    results["optimal"] = counters[1] / max(counters[0], 1)
+    results["perfect"] = counters[2] / max(counters[0], 1)
+    return results
+
+
 def output_tables(game_parameters: Dict, tables: Dict,
                   states: List[int], which_player: int) -> None:
     for i in range(0, len(states)):
@@ -269,4 +940,4 @@ def validation(game_parameters: Dict, tables: Dict, mode: int = 1) -> None:
                                                 438128, 1736176, 1409393, 1959280, 453748, 502899, 1473910, 1922296,
                                                 662778, 179835], 2)
     else:
-        pass
+        print(validate_models_exact(game_parameters, tables))
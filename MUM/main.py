@@ -2,8 +2,11 @@ import json
 import sys
 import time
 import os
-from MUM.learningSystem import train_both_models
-from MUM.stateSystem import read_tables, save_and_prepare_tables
+from MUM.learningSystem import train_both_models, validation
+from MUM.stateSystem import read_tables, save_and_prepare_tables, convert_tables, rebuild_prizes, TABLES_SUFFIX
+from MUM.opponentSystem import save_and_prepare_ai_moves
+from MUM.solverSystem import save_and_solve_tables
+from MUM.generatorSystem import save_and_generate_tables, save_and_stream_tables
 from typing import Dict
 from data_handler import append_to_csv
 
@@ -13,6 +16,7 @@ def generate_meta_file() -> Dict:
     if not os.path.exists(folder_name):
         os.makedirs(folder_name)
 
+    name = sys.argv[1] + "_" + sys.argv[2] + "_" + sys.argv[10]
     game_parameters = {"size_x": int(sys.argv[1]),
                        "size_y": int(sys.argv[2]),
                        "random_plays1": int(sys.argv[3]),
@@ -34,13 +38,20 @@ def generate_meta_file() -> Dict:
                        "alpha": float(sys.argv[19]),
                        "gamma": float(sys.argv[20]),
                        "epsilon": float(sys.argv[21]),
-                       "Generate_tables": "tables_" + sys.argv[1] + "_" + sys.argv[2] + "_" + sys.argv[10] + ".json",
-                       "Updated_tables": "tables_" + sys.argv[1] + "_" + sys.argv[2] + "_" + sys.argv[10] +
-                                         "_trained_" + sys.argv[19] + "_" + sys.argv[20] + "_" + sys.argv[21] + ".json",
-                       "Updated_table_1": "tables1_" + sys.argv[1] + "_" + sys.argv[2] + "_" + sys.argv[10] + ".json",
-                       "Updated_table_2": "tables2_" + sys.argv[1] + "_" + sys.argv[2] + "_" + sys.argv[10] + ".json",
+                       "Generate_tables": "tables_" + name + TABLES_SUFFIX,
+                       "Updated_tables": "tables_" + name + "_trained_" + sys.argv[19] + "_" + sys.argv[20] + "_" +
+                                         sys.argv[21] + TABLES_SUFFIX,
+                       "Updated_table_1": "tables1_" + name + TABLES_SUFFIX,
+                       "Updated_table_2": "tables2_" + name + TABLES_SUFFIX,
                        "process_percent": float(sys.argv[24]),
                        "folder_name": folder_name}
+    # optional parameters after sys.argv[24] are given as key=value, e.g. time_budget=0.5
+    for option in sys.argv[25:]:
+        key, value = option.split("=", 1)
+        try:
+            game_parameters[key] = json.loads(value)
+        except json.JSONDecodeError:
+            game_parameters[key] = value
     file_name = "metafile_" + sys.argv[1] + "_" + sys.argv[2] + "_" + sys.argv[10] + ".json"
     path = os.path.join(folder_name, file_name)
     with open(path, "w") as file:
@@ -54,26 +65,71 @@ def main() -> None:
         > 1 - only generate data needed to play a game and for a model
         > 2 - only learning of a model
         > 3 - generate and learn
+        > 4 - only precompute moves of the alpha-beta opponent for generated data
+        > 5 - only solve generated data, then models can be validated against exact values
+        > 6 - only validate trained models against solved data
+        > 7 - only convert json files with generated and trained tables to directories of .npy files
+        > 8 - only rebuild prizes of generated and trained tables for current weights of rewards
+    optional precompute_ai_moves=1 precomputes them also after generating data (1 and 3),
+    generator=recursive generates data with the depth-first search instead of the vectorized generator,
+    generator=streaming keeps states on disk and uses at most memory_budget MB (e.g. memory_budget=2048),
+    canonical=1 keeps only one of every map and its mirror, tables get 'Flips' to translate moves of the real map,
+    the alpha-beta opponent searches maps kept in tables, so its moves may differ from moves on full tables,
+    batch_size=1024 trains models on many games played in lockstep (learningSystem.run_learning_batched),
+    training=sweep trains models by value iteration over all states (learningSystem.train_value_iteration),
+    training=prioritized updates first moves with the biggest errors (learningSystem.train_prioritized_sweeping),
+    e.g. with max_updates=100000 updates_per_second=50000 priority_tolerance=1 or target_accuracy=0.9 for solved tables,
+    training=distributed trains models with actors sending games over sockets (learningSystem.train_actor_learner),
+    e.g. learner_address=0.0.0.0:5000 actors=8 local_actors=4 and training=actor learner_address=host:5000
+    on other machines, training=selfplay trains both models in the same games (learningSystem.train_self_play),
+    opponent_games=0.2 plays a part of them against the opponent
     :return:
     """
     game_parameters = generate_meta_file()
     if int(sys.argv[22]) == 1 or int(sys.argv[22]) == 3:
         t0 = time.time()
-        save_and_prepare_tables(game_parameters)
+        if game_parameters.get('generator', "vectorized") == "vectorized":
+            save_and_generate_tables(game_parameters)
+        elif game_parameters['generator'] == "streaming":
+            save_and_stream_tables(game_parameters)
+        else:
+            save_and_prepare_tables(game_parameters)
         t1 = time.time()
         append_to_csv("time_data.csv", [t1 - t0, "GeneratingData", game_parameters['size_x'],
                                         game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    if int(sys.argv[22]) == 4 or \
+            (int(sys.argv[22]) in (1, 3) and game_parameters.get('precompute_ai_moves', 0)):
+        save_and_prepare_ai_moves(game_parameters, game_parameters['Generate_tables'])
+    if int(sys.argv[22]) == 5:
+        save_and_solve_tables(game_parameters, game_parameters['Generate_tables'])
     if int(sys.argv[22]) == 2 or int(sys.argv[22]) == 3:
         iterations = int(sys.argv[23])
         t0 = time.time()
         # train_both_models(game_parameters, iterations, read_tables(game_parameters['Generate_tables'],
         # game_parameters))
         train_both_models(game_parameters, iterations, read_tables(game_parameters['Updated_tables'],
-                                                                   game_parameters))
+                                                                   game_parameters, mmap_mode="r"))
         t1 = time.time()
         append_to_csv("time_data.csv", [t1 - t0, "TrainingModel", game_parameters['size_x'],
                                         game_parameters['size_y'], game_parameters['min_to_win'], "no"])
         print("Training model: " + str(t1 - t0) + " seconds.")
+    if int(sys.argv[22]) == 7:
+        for key in ('Generate_tables', 'Updated_tables'):
+            json_name = game_parameters[key][:-len(TABLES_SUFFIX)] + ".json"
+            if os.path.exists(os.path.join(game_parameters['folder_name'], json_name)):
+                print("Converting " + json_name)
+                convert_tables(json_name, game_parameters)
+    if int(sys.argv[22]) == 8:
+        for key in ('Generate_tables', 'Updated_tables'):
+            if os.path.exists(os.path.join(game_parameters['folder_name'], game_parameters[key])):
+                t0 = time.time()
+                rebuild_prizes(game_parameters[key], game_parameters)
+                t1 = time.time()
+                print("Rebuilding prizes of " + game_parameters[key] + ": " + str(t1 - t0) + " seconds.")
+                append_to_csv("time_data.csv", [t1 - t0, "RebuildingPrizes", game_parameters['size_x'],
+                                                game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    if int(sys.argv[22]) == 6:
+        validation(game_parameters, read_tables(game_parameters['Updated_tables'], game_parameters), 1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,133 @@
+import multiprocessing as mp
+import time
+import numpy as np
+from typing import Dict, Tuple
+from MUM.aiSystem import generate_board
+from MUM.bitboardSystem import play_move_ai_bitboard, return_equal_moves, is_random_node
+from MUM.stateSystem import process_number, read_tables, save_tables
+from MUM.data_handler import append_to_csv
+
+worker_data = {}
+
+
+def return_ai_depths(game_parameters: Dict) -> list:
+    """
+    learningSystem.learn_model uses depth_2 for the opponent playing first and depth_1 for the second one
+    :param game_parameters: parameters of the game
+    :return: depth of the search for states of the first and the second player
+    """
+    return [game_parameters['depth_2'], game_parameters['depth_1']]
+
+
+def init_worker(boards: np.ndarray, terminal: np.ndarray, which_player: int,
+                depth: int, game_parameters: Dict) -> None:
+    worker_data['boards'] = boards
+    worker_data['terminal'] = terminal
+    worker_data['which_player'] = which_player
+    worker_data['depth'] = depth
+    worker_data['game_parameters'] = game_parameters
+
+
+def return_ai_moves(indexes: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    runs alpha-beta opponent for states from indexes[0] to indexes[1]
+    :param indexes: first state and the state after the last one
+    :return: chosen moves (-1 for ending states) and bitmasks of equally good moves
+    """
+    boards = worker_data['boards']
+    which_player = worker_data['which_player']
+    depth = worker_data['depth']
+    game_parameters = worker_data['game_parameters']
+    np.random.seed(indexes[0] * 2 + which_player)
+    moves = np.full(indexes[1] - indexes[0], -1, dtype=np.int8)
+    move_sets = np.zeros(indexes[1] - indexes[0], dtype=np.uint16)
+    for i in range(indexes[0], indexes[1]):
+        if worker_data['terminal'][i]:
+            continue
+        number_of_moves = int(np.count_nonzero(boards[i]))
+        played_moves = generate_board(boards[i], game_parameters)
+        move = play_move_ai_bitboard(boards[i], depth, which_player, played_moves,
+                                     number_of_moves, which_player, game_parameters)
+        if is_random_node(which_player, number_of_moves, game_parameters):
+            equal_moves = return_equal_moves(boards[i], depth, which_player, played_moves,
+                                             number_of_moves, which_player, game_parameters)
+        else:
+            equal_moves = [move]
+        moves[i - indexes[0]] = move
+        for equal_move in equal_moves:
+            if equal_move >= 0:
+                move_sets[i - indexes[0]] |= 1 << equal_move
+    return moves, move_sets
+
+
+def prepare_ai_moves(tables: Dict, game_parameters: Dict) -> None:
+    """
+    adds to tables moves of the alpha-beta opponent for every state:
+    'AI-Moves' - move chosen by the search, 'AI-Move-Sets' - bitmask of equally good moves,
+    from which random opponent moves are drawn, 'AI-Depths' - depths used for both players,
+    with 'Flips' moves are searched on maps kept in tables, not on their mirrors
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    depths = return_ai_depths(game_parameters)
+    number_of_processes = process_number(game_parameters['process_percent'])
+    tables['AI-Moves'] = [np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int8)]
+    tables['AI-Move-Sets'] = [np.zeros(0, dtype=np.uint16), np.zeros(0, dtype=np.uint16)]
+    for i in range(0, 2):
+        how_many = len(tables['Boards'][i])
+        if how_many == 0:
+            continue
+        boards = np.array(tables['Boards'][i], dtype=np.int8)
+        terminal = np.asarray(tables['Terminals'][i], dtype=bool)
+        chunk = max(1, how_many // (number_of_processes * 16))
+        chunks = [(j, min(j + chunk, how_many)) for j in range(0, how_many, chunk)]
+        with mp.Pool(number_of_processes, initializer=init_worker,
+                     initargs=(boards, terminal, i + 1, depths[i], game_parameters)) as pool:
+            results = pool.map(return_ai_moves, chunks)
+        tables['AI-Moves'][i] = np.concatenate([result[0] for result in results])
+        tables['AI-Move-Sets'][i] = np.concatenate([result[1] for result in results])
+    tables['AI-Depths'] = depths
+
+
+def has_ai_moves(tables: Dict, game_parameters: Dict) -> bool:
+    """
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param game_parameters: parameters of the game
+    :return: are there precomputed moves for the current depths
+    """
+    return 'AI-Move-Sets' in tables and list(tables['AI-Depths']) == return_ai_depths(game_parameters)
+
+
+def play_move_precomputed(tables: Dict, which_player: int, state: int, game_parameters: Dict) -> int:
+    """
+    move of the alpha-beta opponent read from tables, equally good moves are drawn with np.random
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who is going to move - use 1 or 2
+    :param state: index of state
+    :param game_parameters: parameters of the game
+    :return: which move is going to be the best
+    """
+    move_set = int(tables['AI-Move-Sets'][which_player - 1][state])
+    moves = [i for i in range(0, game_parameters['size_x']) if move_set >> i & 1]
+    if len(moves) > 1:
+        return moves[np.random.randint(0, len(moves))]
+    return int(tables['AI-Moves'][which_player - 1][state])
+
+
+def save_and_prepare_ai_moves(game_parameters: Dict, file_name: str) -> None:
+    """
+    adds moves of the alpha-beta opponent to saved tables
+    :param game_parameters: parameters of the game
+    :param file_name: name of the file with tables
+    :return:
+    """
+    tables = read_tables(file_name, game_parameters)
+    print("Preparing moves of AI")
+    t0 = time.time()
+    prepare_ai_moves(tables, game_parameters)
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingAIMoves", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    save_tables(tables, file_name, game_parameters)
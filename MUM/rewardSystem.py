@@ -1,5 +1,12 @@
 import numpy as np
-from typing import Dict
+from typing import Dict, List
+from MUM.bitboardSystem import row_rays, row_lengths_many, boards_to_bitboards, bit_index
+
+# how many moves are scored at once by prepare_move_features
+BLOCK_SIZE = 2 ** 18
+# weights of features returned by return_features
+REWARD_WEIGHTS = ["move_point", "win_prize", "points_for_rows", "points_for_creating_ending_state",
+                  "points_for_blocking", "points_for_preventing_ending_state"]
 
 
 def crossed_row(pos: Dict, which_player: int,
@@ -16,7 +23,47 @@ def horizontal_vertical_row(pos: Dict, which_player: int,
 
 def counter_row(pos: Dict, which_player: int,
                 game_board: np.ndarray, game_parameters: Dict, type_of_row: int) -> int:
+    """
+    :param pos: dict, containing x and y coords of the new coin
+    :param which_player: which number is counted
+    :param game_board: visualized numpy array
+    :param game_parameters: parameters of the game
+    :param type_of_row: 1 - horizontal, 2 - vertical (only downwards), 3 and 4 - diagonal
+    :return: length of the row of which_player through the new coin, including it
+    """
+    if not 1 <= type_of_row <= 4:
+        return 1
+    return row_lengths(pos, which_player, game_board, game_parameters)[type_of_row - 1]
+
 
+def row_lengths(pos: Dict, which_player: int, game_board: np.ndarray, game_parameters: Dict) -> List[int]:
+    """
+    counter_row of every type at once - every side of a row is counted up to min_to_win fields
+    precomputed by bitboardSystem.row_rays, so there are no recursion and no checks of borders
+    :param pos: dict, containing x and y coords of the new coin
+    :param which_player: which number is counted
+    :param game_board: visualized numpy array
+    :param game_parameters: parameters of the game
+    :return: lengths of rows of type 1 - 4
+    """
+    lengths = []
+    for rays in row_rays(int(pos['pos_x']), int(pos['pos_y']), game_parameters['size_x'],
+                         game_parameters['size_y'], game_parameters['min_to_win']):
+        row = 1
+        for ray in rays:
+            for field in ray:
+                if game_board[field] != which_player:
+                    break
+                row += 1
+        lengths.append(row)
+    return lengths
+
+
+def counter_row_recursive(pos: Dict, which_player: int,
+                          game_board: np.ndarray, game_parameters: Dict, type_of_row: int) -> int:
+    """
+    counter_row, which walks the map field by field with counter - kept as the reference for benchmarks
+    """
     if type_of_row == 1:
         x_mod = 1
         y_mod = 0
@@ -85,39 +132,149 @@ def is_between_borders(x: int, y: int,
 def is_the_winner(pos: Dict, which_player: int,
                   game_board: np.ndarray, game_parameters: Dict) -> bool:
     """
-    :param pos:
-    :param which_player:
-    :param game_board:
-    :param game_parameters:
-    :return:
+    :param pos: dict, containing x and y coords of the new coin
+    :param which_player: which player made a move
+    :param game_board: visualized numpy array
+    :param game_parameters: parameters of the game
+    :return: is there a row of min_to_win coins through the new coin
     """
-    return crossed_row(pos, which_player, game_board, game_parameters) or \
-        horizontal_vertical_row(pos, which_player, game_board, game_parameters)
+    return max(row_lengths(pos, which_player, game_board, game_parameters)) >= game_parameters['min_to_win']
 
 
-def return_prize(pos: Dict, which_player: int,
-                 game_board: np.ndarray, game_parameters: Dict) -> int:
+def return_features(pos: Dict, which_player: int,
+                    game_board: np.ndarray, game_parameters: Dict) -> List[int]:
     """
     :param pos: dict, containing x and y coords
     :param which_player: which player made a move
     :param game_board: visualized numpy array
     :param game_parameters: parameters of the game
-    :return:
+    :return: counts of things rewarded by return_prize, in the order of REWARD_WEIGHTS
     """
-    prize = game_parameters['move_point']
-    if is_the_winner(pos, which_player, game_board, game_parameters):
-        prize += game_parameters['win_prize']
-
-    for i in range(1, 5):
-        repeats = counter_row(pos, which_player, game_board, game_parameters, i) - 1
+    features = [1, 0, 0, 0, 0, 0]
+    own = row_lengths(pos, which_player, game_board, game_parameters)
+    enemy = row_lengths(pos, (which_player % 2) + 1, game_board, game_parameters)
+    for i in range(0, 4):
+        repeats = own[i] - 1
+        if repeats >= game_parameters['min_to_win'] - 1:
+            features[1] = 1
         if repeats != 0:
             if repeats == game_parameters['min_to_win'] - 1:
-                prize += game_parameters['points_for_creating_ending_state']
-            prize += repeats * game_parameters['points_for_rows']
-        repeats = counter_row(pos, (which_player % 2) + 1, game_board, game_parameters, i) - 1
+                features[3] += 1
+            features[2] += repeats
+        repeats = enemy[i] - 1
         if repeats != 0:
             if repeats == game_parameters['min_to_win'] - 1:
-                prize += game_parameters['points_for_preventing_ending_state']
-            prize += repeats * game_parameters['points_for_blocking']
+                features[5] += 1
+            features[4] += repeats
+    return features
 
-    return prize
+
+def return_features_many(own: np.ndarray, enemy: np.ndarray, pos_x: np.ndarray, pos_y: np.ndarray,
+                         game_parameters: Dict) -> np.ndarray:
+    """
+    return_features for many moves at once
+    :param own: int64 bitmasks of the player, who moved, with the new coin
+    :param enemy: int64 bitmasks of the other player
+    :param pos_x: x_cord of the new coin of every move
+    :param pos_y: y_cord of the new coin of every move
+    :param game_parameters: parameters of the game
+    :return: int8 array N x len(REWARD_WEIGHTS)
+    """
+    last = game_parameters['min_to_win'] - 1
+    own = row_lengths_many(own, pos_x, pos_y, game_parameters) - 1
+    enemy = row_lengths_many(enemy, pos_x, pos_y, game_parameters) - 1
+    features = np.zeros((len(own), len(REWARD_WEIGHTS)), dtype=np.int8)
+    features[:, 0] = 1
+    features[:, 1] = (own >= last).any(axis=1)
+    features[:, 2] = own.sum(axis=1)
+    features[:, 3] = (own == last).sum(axis=1)
+    features[:, 4] = enemy.sum(axis=1)
+    features[:, 5] = (enemy == last).sum(axis=1)
+    return features
+
+
+def return_prizes_many(boards: np.ndarray, pos_x: np.ndarray, pos_y: np.ndarray, which_player: int,
+                       game_parameters: Dict) -> np.ndarray:
+    """
+    return_prize for many moves at once
+    :param boards: numpy array N x size_y x size_x of maps with new coins
+    :param pos_x: x_cord of the new coin on every map
+    :param pos_y: y_cord of the new coin on every map
+    :param which_player: which player made moves
+    :param game_parameters: parameters of the game
+    :return: int64 prizes of moves
+    """
+    masks = boards_to_bitboards(np.asarray(boards), game_parameters)
+    features = return_features_many(masks[which_player - 1], masks[2 - which_player], pos_x, pos_y, game_parameters)
+    return features.astype(np.int64) @ return_weights(game_parameters)
+
+
+def prepare_move_features(mask_1: np.ndarray, mask_2: np.ndarray, allowed: np.ndarray, which_player: int,
+                          game_parameters: Dict) -> np.ndarray:
+    """
+    features of every allowed move on every map, scored by return_features_many column by column
+    in blocks of BLOCK_SIZE maps
+    :param mask_1: int64 bitmasks of the first player
+    :param mask_2: int64 bitmasks of the second player
+    :param allowed: N x size_x - is the move allowed
+    :param which_player: who is going to move - use 1 or 2
+    :param game_parameters: parameters of the game
+    :return: int8 features N x size_x x len(REWARD_WEIGHTS), zeros for not allowed moves
+    """
+    size_y = game_parameters['size_y']
+    allowed = np.asarray(allowed)
+    features = np.zeros(allowed.shape + (len(REWARD_WEIGHTS),), dtype=np.int8)
+    for start in range(0, len(allowed), BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        mover, other = (mask_1[block], mask_2[block]) if which_player == 1 else (mask_2[block], mask_1[block])
+        taken = mover | other
+        for x in range(0, game_parameters['size_x']):
+            rows = np.nonzero(allowed[block, x])[0]
+            column = taken[rows] >> np.int64(bit_index(x, 0, size_y))
+            heights = np.zeros(len(rows), dtype=np.int64)
+            for y in range(0, size_y):
+                heights += (column >> np.int64(y)) & 1
+            own = mover[rows] | (np.int64(1) << (heights + bit_index(x, 0, size_y)))
+            features[start + rows, x] = return_features_many(own, other[rows], np.full(len(rows), x), heights,
+                                                             game_parameters)
+    return features
+
+
+def return_weights(game_parameters: Dict) -> np.ndarray:
+    """
+    :param game_parameters: parameters of the game
+    :return: weights of features from return_features
+    """
+    return np.array([game_parameters[key] for key in REWARD_WEIGHTS], dtype=np.int64)
+
+
+def return_prize(pos: Dict, which_player: int,
+                 game_board: np.ndarray, game_parameters: Dict) -> int:
+    """
+    :param pos: dict, containing x and y coords
+    :param which_player: which player made a move
+    :param game_board: visualized numpy array
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    return features_to_prize(return_features(pos, which_player, game_board, game_parameters), game_parameters)
+
+
+def features_to_prize(features: List[int], game_parameters: Dict) -> int:
+    """
+    :param features: features of the move from return_features
+    :param game_parameters: parameters of the game
+    :return: prize of the move
+    """
+    return sum(features[i] * game_parameters[REWARD_WEIGHTS[i]] for i in range(0, len(REWARD_WEIGHTS)))
+
+
+def prepare_prizes_from_features(features: np.ndarray, states: np.ndarray, game_parameters: Dict) -> np.ndarray:
+    """
+    :param features: int8 array N x size_x x len(REWARD_WEIGHTS) of features of every move
+    :param states: int32 array N x size_x of next states, -1 for not allowed moves
+    :param game_parameters: parameters of the game
+    :return: int32 prizes N x size_x, not_allowed_move_prize for not allowed moves
+    """
+    prizes = np.asarray(features, dtype=np.int64) @ return_weights(game_parameters)
+    return np.where(np.asarray(states) != -1, prizes, game_parameters['not_allowed_move_prize']).astype(np.int32)
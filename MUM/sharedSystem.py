@@ -0,0 +1,73 @@
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+
+def share_tables(tables: Dict) -> Tuple[Dict, List[shared_memory.SharedMemory]]:
+    """
+    copies q-tables of both players to shared memory - processes attached with attach_tables
+    read and write the same arrays, so q-tables are neither pickled nor copied for every process,
+    other columns are only read, so memory-mapped columns are mapped again by every process
+    and the rest is passed unchanged
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :return: description of tables, which can be passed to other processes, and blocks of shared memory
+    """
+    description = {}
+    blocks = []
+    for key in tables:
+        if not isinstance(tables[key], list) or len(tables[key]) != 2 or np.ndim(tables[key][0]) == 0:
+            description[key] = tables[key]
+            continue
+        if key != 'Q-Tables':
+            if all(isinstance(array, np.memmap) and array.filename is not None for array in tables[key]):
+                description[key] = {"mapped": [{"filename": array.filename, "offset": array.offset,
+                                                "shape": array.shape, "dtype": array.dtype.str}
+                                               for array in tables[key]]}
+            else:
+                description[key] = tables[key]
+            continue
+        seats = []
+        for i in range(0, 2):
+            array = np.ascontiguousarray(tables[key][i])
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            blocks.append(block)
+            seats.append({"name": block.name, "shape": array.shape, "dtype": array.dtype.str})
+        description[key] = {"shared": seats}
+    return description, blocks
+
+
+def attach_tables(description: Dict) -> Tuple[Dict, List[shared_memory.SharedMemory]]:
+    """
+    :param description: description of tables from share_tables
+    :return: tables, which use shared memory, and attached blocks - close them, when tables are not used
+    """
+    tables = {}
+    blocks = []
+    for key in description:
+        if isinstance(description[key], dict) and "mapped" in description[key]:
+            tables[key] = [np.memmap(seat['filename'], dtype=np.dtype(seat['dtype']), mode="r",
+                                     offset=seat['offset'], shape=seat['shape'])
+                           for seat in description[key]['mapped']]
+            continue
+        if not isinstance(description[key], dict) or "shared" not in description[key]:
+            tables[key] = description[key]
+            continue
+        tables[key] = []
+        for seat in description[key]['shared']:
+            block = shared_memory.SharedMemory(name=seat['name'])
+            blocks.append(block)
+            tables[key].append(np.ndarray(seat['shape'], dtype=np.dtype(seat['dtype']), buffer=block.buf))
+    return tables, blocks
+
+
+def release_tables(blocks: List[shared_memory.SharedMemory], unlink: bool = False) -> None:
+    """
+    :param blocks: blocks of shared memory
+    :param unlink: should memory be freed - only the process, which shared tables, does it
+    :return:
+    """
+    for block in blocks:
+        block.close()
+        if unlink:
+            block.unlink()
@@ -0,0 +1,100 @@
+import time
+import numpy as np
+from typing import Dict, List
+from MUM.stateSystem import read_tables, save_tables
+from MUM.data_handler import append_to_csv
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+
+def solve_tables(tables: Dict, game_parameters: Dict) -> None:
+    """
+    labels every state as WIN, DRAW or LOSS of the player to move, using backward induction from the last ply
+    to the first one over tables['States'], and adds to tables:
+    'Values' - int8 value, 'Distances' - int16 number of moves to the end of the game with the best play,
+    'Optimal-Moves' - uint16 bitmask of moves keeping the value, 'Perfect-Moves' - int8 move of the perfect player
+    (the fastest win, the longest defence), -1 for ending states
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    size_x = game_parameters['size_x']
+    size_y = game_parameters['size_y']
+    states = [np.asarray(tables['States'][i], dtype=np.int32).reshape(-1, size_x) for i in range(0, 2)]
+    boards = [np.asarray(tables['Boards'][i], dtype=np.int8).reshape(-1, size_y, size_x) for i in range(0, 2)]
+    plies = [np.count_nonzero(boards[i].reshape(len(boards[i]), -1), axis=1) for i in range(0, 2)]
+    terminal = [np.asarray(tables['Terminals'][i], dtype=bool) for i in range(0, 2)]
+    values = [np.zeros(len(states[i]), dtype=np.int8) for i in range(0, 2)]
+    distances = [np.zeros(len(states[i]), dtype=np.int16) for i in range(0, 2)]
+    optimal_moves = [np.zeros(len(states[i]), dtype=np.uint16) for i in range(0, 2)]
+    perfect_moves = [np.full(len(states[i]), -1, dtype=np.int8) for i in range(0, 2)]
+    for i in range(0, 2):
+        # the last move has won the game or the map is full
+        values[i][terminal[i]] = np.where(np.asarray(tables['Winners'][i])[terminal[i]] != 0, LOSS, DRAW)
+
+    columns = np.arange(0, size_x, dtype=np.uint16)
+    for ply in range(size_x * size_y, -1, -1):
+        seat = ply % 2
+        other = 1 - seat
+        index = np.nonzero((plies[seat] == ply) & ~terminal[seat])[0]
+        if len(index) == 0:
+            continue
+        children = states[seat][index]
+        legal = children != -1
+        safe_children = np.where(legal, children, 0)
+        scores = np.where(legal, -values[other][safe_children], -2)
+        child_distances = distances[other][safe_children]
+        best = scores.max(axis=1)
+        best_moves = legal & (scores == best[:, None])
+        shortest = np.where(best_moves, child_distances, np.iinfo(np.int16).max).min(axis=1)
+        longest = np.where(best_moves, child_distances, -1).max(axis=1)
+        distance = np.where(best == WIN, shortest, longest)
+        values[seat][index] = best
+        distances[seat][index] = distance + 1
+        optimal_moves[seat][index] = (best_moves.astype(np.uint16) << columns).sum(axis=1)
+        perfect_moves[seat][index] = np.argmax(best_moves & (child_distances == distance[:, None]), axis=1)
+
+    tables['Values'] = values
+    tables['Distances'] = distances
+    tables['Optimal-Moves'] = optimal_moves
+    tables['Perfect-Moves'] = perfect_moves
+
+
+def play_move_perfect(tables: Dict, which_player: int, state: int) -> int:
+    """
+    :param tables: dict, which contains solved tables
+    :param which_player: who is going to move - use 1 or 2
+    :param state: index of state
+    :return: move of the perfect player
+    """
+    return int(tables['Perfect-Moves'][which_player - 1][state])
+
+
+def save_and_solve_tables(game_parameters: Dict, file_name: str) -> None:
+    """
+    adds exact values of all states to saved tables
+    :param game_parameters: parameters of the game
+    :param file_name: name of the file with tables
+    :return:
+    """
+    tables = read_tables(file_name, game_parameters)
+    print("Solving game")
+    t0 = time.time()
+    solve_tables(tables, game_parameters)
+    t1 = time.time()
+    print(str(t1 - t0) + " seconds")
+    print(count_values(tables))
+    append_to_csv("time_data.csv", [t1 - t0, "SolvingGame", game_parameters['size_x'],
+                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    save_tables(tables, file_name, game_parameters)
+
+
+def count_values(tables: Dict) -> List[Dict]:
+    """
+    :param tables: dict, which contains solved tables
+    :return: how many states of both players are won, drawn and lost
+    """
+    return [{"win": int(np.sum(tables['Values'][i] == WIN)), "draw": int(np.sum(tables['Values'][i] == DRAW)),
+             "loss": int(np.sum(tables['Values'][i] == LOSS))} for i in range(0, 2)]
@@ -5,9 +5,23 @@ import os
 
 import numpy as np
 import copy
-from typing import List, Dict, Set
-from MUM.rewardSystem import return_prize, is_the_winner
-from MUM.data_handler import append_to_csv
+from functools import lru_cache
+from typing import Callable, List, Dict, Set, Tuple
+from MUM.rewardSystem import prepare_move_features, prepare_prizes_from_features, is_the_winner
+from MUM.data_handler import append_to_csv, reset_peak_memory, return_peak_memory
+from MUM.boardSystem import GameBoard
+from MUM.bitboardSystem import boards_to_bitboards, has_won_many
+
+# columns, which may be added to tables after generation, with their types
+ADDITIONAL_COLUMNS = {"AI-Moves": np.int8, "AI-Move-Sets": np.uint16, "Flips": np.uint16, "Features": np.int8,
+                      "Values": np.int8, "Distances": np.int16, "Optimal-Moves": np.uint16, "Perfect-Moves": np.int8}
+# columns of generated tables with types used in directories of .npy files
+TABLE_COLUMNS = {"States": np.int32, "Q-Tables": np.float64, "Prizes": np.int32, "Boards": np.int8,
+                 "Legal-Moves": np.uint16, "Terminals": np.bool_, "Winners": np.int8, "Draws": np.bool_}
+COLUMN_TYPES = {**TABLE_COLUMNS, **ADDITIONAL_COLUMNS}
+TABLES_SUFFIX = ".tables"
+TABLES_VERSION = 1
+MANIFEST_NAME = "manifest.json"
 
 
 def process_number(percent: float) -> int:
@@ -46,6 +60,136 @@ def available_moves(played_moves: np.ndarray, size_y: int, size_x: int) -> np.nd
                     dtype=int)
 
 
+def prepare_legal_moves(states: np.ndarray) -> np.ndarray:
+    """
+    :param states: int32 array N x size_x of next states, -1 for not allowed moves
+    :return: uint16 bitmask of allowed moves for every state
+    """
+    states = np.asarray(states).reshape(len(states), -1)
+    return ((states != -1).astype(np.uint16) << np.arange(0, states.shape[1], dtype=np.uint16)).sum(
+        axis=1, dtype=np.uint16)
+
+
+@lru_cache(maxsize=None)
+def mask_to_moves(mask: int, size_x: int) -> Tuple[int, ...]:
+    """
+    :param mask: bitmask of allowed moves
+    :param size_x: horizontal size of the map
+    :return: allowed moves in increasing order
+    """
+    return tuple(i for i in range(0, size_x) if (mask >> i) & 1)
+
+
+def legal_moves(tables: Dict, which_player: int, state: int, game_parameters: Dict) -> Tuple[int, ...]:
+    """
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who is going to move - use 1 or 2
+    :param state: index of state
+    :param game_parameters: parameters of the game
+    :return: allowed moves in increasing order
+    """
+    return mask_to_moves(int(tables['Legal-Moves'][which_player - 1][state]), game_parameters['size_x'])
+
+
+def table_move(move: int, flipped: bool, game_parameters: Dict) -> int:
+    """
+    tables with 'Flips' keep only one of a map and its mirror, so moves on the real map are mirrored,
+    when the state is flipped - the same function translates moves back
+    :param move: move on the real map or in tables
+    :param flipped: is the real map the mirror of the map in tables
+    :param game_parameters: parameters of the game
+    :return: the move in tables or on the real map
+    """
+    return game_parameters['size_x'] - 1 - move if flipped else move
+
+
+def play_table_move(tables: Dict, which_player: int, state: int, flipped: bool, move: int,
+                    game_parameters: Dict) -> Tuple[int, bool]:
+    """
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who is going to move - use 1 or 2
+    :param state: index of state
+    :param flipped: is the real map the mirror of the map in tables
+    :param move: move on the real map
+    :param game_parameters: parameters of the game
+    :return: index of the next state and is its real map the mirror of the map in tables
+    """
+    move = table_move(move, flipped, game_parameters)
+    next_state = int(tables['States'][which_player - 1][state][move])
+    if 'Flips' in tables:
+        flipped = flipped != bool(int(tables['Flips'][which_player - 1][state]) >> move & 1)
+    return next_state, flipped
+
+
+def table_board(tables: Dict, which_player: int, state: int, flipped: bool) -> np.ndarray:
+    """
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param which_player: who is going to move - use 1 or 2
+    :param state: index of state
+    :param flipped: is the real map the mirror of the map in tables
+    :return: the real map
+    """
+    board = np.asarray(tables['Boards'][which_player - 1][state])
+    return board[:, ::-1] if flipped else board
+
+
+def prepare_ending_flags(states: np.ndarray, boards: np.ndarray,
+                         game_parameters: Dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :param states: int32 array N x size_x of next states, -1 for not allowed moves
+    :param boards: maps of the states, N x size_y x size_x
+    :param game_parameters: parameters of the game
+    :return: is the state ending (no allowed moves), who has won in it (0 - nobody) and is it a draw
+    (ending state without the winner) for every state
+    """
+    states = np.asarray(states).reshape(len(states), -1)
+    terminals = (states == -1).all(axis=1)
+    winners = np.zeros(len(states), dtype=np.int8)
+    index = np.nonzero(terminals)[0]
+    if len(index) > 0:
+        mask_1, mask_2 = boards_to_bitboards(np.asarray(boards)[index].reshape(
+            -1, game_parameters['size_y'], game_parameters['size_x']), game_parameters)
+        for which_player, mask in ((1, mask_1), (2, mask_2)):
+            won = has_won_many(mask, game_parameters['size_y'], game_parameters['min_to_win'])
+            winners[index[won]] = which_player
+    return terminals, winners, terminals & (winners == 0)
+
+
+def add_ending_flags(tables: Dict, game_parameters: Dict, mode: int = 0) -> None:
+    """
+    adds 'Terminals', 'Winners' and 'Draws' to tables, which were saved without them
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param game_parameters: parameters of the game
+    :param mode: 0 for both players, any other int for only one
+    :return:
+    """
+    if 'States' not in tables or 'Boards' not in tables or 'Terminals' in tables:
+        return
+    if mode == 0:
+        flags = [prepare_ending_flags(tables['States'][i], tables['Boards'][i], game_parameters) for i in range(0, 2)]
+        tables['Terminals'] = [flags[0][0], flags[1][0]]
+        tables['Winners'] = [flags[0][1], flags[1][1]]
+        tables['Draws'] = [flags[0][2], flags[1][2]]
+    else:
+        tables['Terminals'], tables['Winners'], tables['Draws'] = \
+            prepare_ending_flags(tables['States'], tables['Boards'], game_parameters)
+
+
+def add_legal_moves(tables: Dict, mode: int = 0) -> None:
+    """
+    adds 'Legal-Moves' to tables, which were saved without them
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param mode: 0 for both players, any other int for only one
+    :return:
+    """
+    if 'States' in tables and 'Legal-Moves' not in tables:
+        if mode == 0:
+            tables['Legal-Moves'] = [prepare_legal_moves(tables['States'][0]),
+                                     prepare_legal_moves(tables['States'][1])]
+        else:
+            tables['Legal-Moves'] = prepare_legal_moves(tables['States'])
+
+
 def return_list_of_lists(how_many_lists: int) -> List[List]:
     return [[] for row in range(0, how_many_lists)]
 
@@ -59,33 +203,13 @@ def is_in_list(hash_value: int, hash_list: Set) -> bool:
     return hash_value in hash_list
 
 
-def return_game_map(game_board: np.ndarray, move: int,
-                    which_player: int, moves_board: np.ndarray,
-                    how_many_moves: int) -> Dict:
-    """
-    :param game_board: map of the game, size_x x size_y
-    :param move: played move
-    :param which_player: who played move
-    :param moves_board: numpy array: [0] - how many moves played [1] - index of move
-    :param how_many_moves: how many moves played
-    :return: dict containing updated board, its moves, move, where on board is new coin, move number and who moved
-    """
-    return_game_board = copy.deepcopy(game_board)
-    return_game_board[moves_board[0][move]][move] = which_player
-    return_moves_board = copy.deepcopy(moves_board)
-    return_moves_board[0][move] += 1
-    return {"board": return_game_board, "moves_board": return_moves_board,
-            "move": move, "add_pos": {"pos_x": move, "pos_y": return_moves_board[0][move] - 1},
-            "move_number": how_many_moves, "who_moved": which_player}
-
-
 def prepare_list_of_boards(game_board: np.ndarray, how_many_moves: int,
                            moves_board: np.ndarray, game_parameters: Dict,
                            is_ending_state: bool, list_to_append: List[List[Dict]],
                            hash_set: Set) -> None:
     """
     function for preparing list of all boards
-    :param hash_set: list of hashes
+    :param hash_set: set of keys of already generated maps
     :param game_board: current map of the game, size_x x size_y
     :param how_many_moves: how many moves already played
     :param moves_board: numpy array: [0] - how many moves played [1] - index of move
@@ -94,319 +218,298 @@ def prepare_list_of_boards(game_board: np.ndarray, how_many_moves: int,
     :param list_to_append: where to add new, generated map of the game
     :return:
     """
-    new_hash = hash(game_board.tobytes())
-    if not is_in_list(new_hash, hash_set):
-        hash_set.add(new_hash)
-        prizes_1 = [game_parameters['not_allowed_move_prize']
-                    for i in range(0, game_parameters['size_x'])]
+    prepare_list_of_boards_in_place(GameBoard(copy.deepcopy(game_board), copy.deepcopy(moves_board)),
+                                    how_many_moves, game_parameters, is_ending_state, list_to_append, hash_set)
+
+
+def prepare_list_of_boards_in_place(board: GameBoard, how_many_moves: int, game_parameters: Dict,
+                                    is_ending_state: bool, list_to_append: List[List[Dict]],
+                                    hash_set: Set) -> None:
+    """
+    prepare_list_of_boards, which plays and takes back moves on one map - only new states are copied
+    :param board: current map of the game with heights of columns, it is the same after the call
+    :param how_many_moves: how many moves already played
+    :param game_parameters: parameters of the game
+    :param is_ending_state: is it a last, possible state or not
+    :param list_to_append: where to add new, generated map of the game
+    :param hash_set: set of keys of already generated maps
+    :return:
+    """
+    if not is_in_list(board.key, hash_set):
+        hash_set.add(board.key)
         if how_many_moves % 2 == 0:
             which_player = 1
         else:
             which_player = 2
-        if is_ending_state:
-            possible_next_states = []
-        else:
-            moves = available_moves(moves_board, game_parameters['size_y'], game_parameters['size_x'])
-            possible_next_states = [return_game_map(game_board, move, which_player, moves_board, how_many_moves + 1)
-                                    for move in moves]
-            prizes_2 = [(return_prize({"pos_x": state['add_pos']['pos_x'], "pos_y": state['add_pos']['pos_y']},
-                                      which_player, state['board'], game_parameters), state['move'])
-                        for state in possible_next_states]
-            for prize in prizes_2:
-                prizes_1[prize[1]] = prize[0]
-
-        prizes = prizes_1
-
-        list_to_append[how_many_moves].append({"state": game_board, "prizes": prizes,
-                                               "next_states": [{"board_hash": hash(next_state['board'].tobytes()),
-                                                                "move": next_state['move']}
-                                                               for next_state in possible_next_states],
+        next_states = []
+        endings = []
+        if not is_ending_state:
+            for move in board.available_moves():
+                pos = {"pos_x": move, "pos_y": board.make_move(move, which_player)}
+                next_states.append({"board_key": board.key, "move": move})
+                endings.append(is_the_winner(pos, which_player, board.board, game_parameters))
+                board.unmake_move(move)
+
+        list_to_append[how_many_moves].append({"state": board.board.copy(), "key": board.key,
+                                               "next_states": next_states,
                                                "who_moved": which_player})
-        """
-        print({"state": game_board, "prizes": prizes,
-               "next_states": possible_next_states,
-               "who_moved": which_player})
-        """
-        if len(possible_next_states) != 0:
-            for i in range(0, len(possible_next_states)):
-                pos = {"pos_x": possible_next_states[i]['add_pos']['pos_x'],
-                       "pos_y": possible_next_states[i]['add_pos']['pos_y']}
-                if is_the_winner(pos, which_player, possible_next_states[i]['board'], game_parameters):
-                    ending = True
-                else:
-                    ending = False
-                prepare_list_of_boards(possible_next_states[i]['board'], possible_next_states[i]['move_number'],
-                                       possible_next_states[i]['moves_board'], game_parameters, ending, list_to_append,
-                                       hash_set)
-
-
-def prepare_tables(all_states: List[Dict], game_parameters: Dict) -> Dict:
-    """
-    function to return compressed information about all, possible states
-    :param all_states: list of dicts, which contains all possible states
+        for i in range(0, len(next_states)):
+            board.make_move(next_states[i]['move'], which_player)
+            prepare_list_of_boards_in_place(board, how_many_moves + 1, game_parameters, endings[i],
+                                            list_to_append, hash_set)
+            board.unmake_move(next_states[i]['move'])
+
+
+def prepare_tables(list_of_all_dicts: List[List[Dict]], game_parameters: Dict) -> Dict:
+    """
+    function to return compressed information about all, possible states - output arrays are allocated once
+    and filled in one pass from the last ply to the first one, so ids of next states are already known
+    and are read from the dict of keys of the next ply, states of every player are ordered by ply
+    and by the order of generation, dicts of processed plies are freed, prizes of all moves are computed
+    at once by rewardSystem.prepare_move_features
+    :param list_of_all_dicts: list of states for every ply
     :param game_parameters: parameters of the game
-    :return: compressed dict, which is then saved to json file
+    :return: compressed dict, which is then saved
     """
-    print("Preparing lists")
-    t0 = time.time()
-    state1 = list(filter(lambda e: e['who_moved'] == 1, all_states))
-    state2 = list(filter(lambda e: e['who_moved'] == 2, all_states))
-    t1 = time.time()
-    print(str(t1 - t0) + " seconds")
-
-    print("Indexing states")
+    size_x = game_parameters['size_x']
+    size_y = game_parameters['size_y']
+    print("Preparing arrays")
     t0 = time.time()
-    state1 = [{"board": row} for row in state1]
-    state2 = [{"board": row} for row in state2]
-    # print(state1[0])
-    state1 = [{"board": state1[i]['board'], "id": i} for i in range(0, len(state1))]
-    state2 = [{"board": state2[i]['board'], "id": i} for i in range(0, len(state2))]
-
+    reset_peak_memory()
+    sizes = [len(states) for states in list_of_all_dicts]
+    first_ids = [sum(sizes[j] for j in range(i % 2, i, 2)) for i in range(0, len(sizes) + 1)]
+    counts = [sum(sizes[0::2]), sum(sizes[1::2])]
+    state_table = [np.full((counts[i], size_x), -1, dtype=np.int32) for i in range(0, 2)]
+    q_table = [np.zeros((counts[i], size_x), dtype=float) for i in range(0, 2)]
+    boards = [np.zeros((counts[i], size_y, size_x), dtype=np.int8) for i in range(0, 2)]
     t1 = time.time()
     print(str(t1 - t0) + " seconds")
-    append_to_csv("time_data.csv", [t1 - t0, "IndexingStates", game_parameters['size_x'],
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingArrays", game_parameters['size_x'],
                                     game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    append_to_csv("memory_data.csv", [return_peak_memory(), "PreparingArrays", game_parameters['size_x'],
+                                      game_parameters['size_y'], game_parameters['min_to_win']])
 
-    print("Preparing q-tables")
+    print("Preparing states")
     t0 = time.time()
-    q_table = [np.zeros((len(state1), game_parameters['size_x']), dtype=float),
-               np.zeros((len(state2), game_parameters['size_x']), dtype=float)]
+    reset_peak_memory()
+    next_ids = {}
+    for ply in range(len(list_of_all_dicts) - 1, -1, -1):
+        seat = ply % 2
+        ids = {}
+        for i, state in enumerate(list_of_all_dicts[ply]):
+            state_id = first_ids[ply] + i
+            ids[state['key']] = state_id
+            for next_state in state['next_states']:
+                state_table[seat][state_id, next_state['move']] = next_ids[next_state['board_key']]
+            boards[seat][state_id] = state['state']
+        next_ids = ids
+        list_of_all_dicts[ply] = []
     t1 = time.time()
     print(str(t1 - t0) + " seconds")
-    append_to_csv("time_data.csv", [t1 - t0, "PreparingQTables", game_parameters['size_x'],
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingStates", game_parameters['size_x'],
                                     game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    append_to_csv("memory_data.csv", [return_peak_memory(), "PreparingStates", game_parameters['size_x'],
+                                      game_parameters['size_y'], game_parameters['min_to_win']])
 
     print("Preparing Prizes")
     t0 = time.time()
-    prizes = [[state['board']['prizes'] for state in state1],
-              [state['board']['prizes'] for state in state2]]
+    reset_peak_memory()
+    features = [prepare_move_features(*boards_to_bitboards(boards[i], game_parameters), state_table[i] != -1, i + 1,
+                                      game_parameters) for i in range(0, 2)]
+    prizes = [prepare_prizes_from_features(features[i], state_table[i], game_parameters) for i in range(0, 2)]
     t1 = time.time()
     print(str(t1 - t0) + " seconds")
     append_to_csv("time_data.csv", [t1 - t0, "PreparingPrizes", game_parameters['size_x'],
                                     game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    append_to_csv("memory_data.csv", [return_peak_memory(), "PreparingPrizes", game_parameters['size_x'],
+                                      game_parameters['size_y'], game_parameters['min_to_win']])
 
-    print("Preparing game boards")
+    print("Preparing flags")
     t0 = time.time()
-    boards = [[state['board']['state'] for state in state1],
-              [state['board']['state'] for state in state2]]
+    reset_peak_memory()
+    tables = {"States": state_table, "Q-Tables": q_table,
+              "Prizes": prizes, "Boards": boards, "Features": features,
+              "Legal-Moves": [prepare_legal_moves(state_table[0]), prepare_legal_moves(state_table[1])]}
+    add_ending_flags(tables, game_parameters)
     t1 = time.time()
     print(str(t1 - t0) + " seconds")
-    append_to_csv("time_data.csv", [t1 - t0, "PreparingGameBoards", game_parameters['size_x'],
+    append_to_csv("time_data.csv", [t1 - t0, "PreparingFlags", game_parameters['size_x'],
                                     game_parameters['size_y'], game_parameters['min_to_win'], "no"])
+    append_to_csv("memory_data.csv", [return_peak_memory(), "PreparingFlags", game_parameters['size_x'],
+                                      game_parameters['size_y'], game_parameters['min_to_win']])
+    return tables
 
-    # print(state1[0])
-    print("Hashing")
-    t0 = time.time()
-    """
-    states = [[{"board_hash": hash(row['board']['state'].tobytes()), "id": row['id'],
-                "possible_next_states": [{"board_hash": hash(next_state['board'].tobytes()), "move": next_state['move']}
-                                         for next_state in row['board']['next_states']]} for row in state1],
-              [{"board_hash": hash(row['board']['state'].tobytes()), "id": row['id'],
-                "possible_next_states": [{"board_hash": hash(next_state['board'].tobytes()), "move": next_state['move']}
-                                         for next_state in row['board']['next_states']]} for row in state2]
-              ]
-              """
-    states = [[{"board_hash": hash(row['board']['state'].tobytes()), "id": row['id'],
-                "possible_next_states": row['board']['next_states']} for row in state1],
-              [{"board_hash": hash(row['board']['state'].tobytes()), "id": row['id'],
-                "possible_next_states": row['board']['next_states']} for row in state2]
-              ]
-    # print(states[0][0])
-    t1 = time.time()
-    print(str(t1 - t0) + " seconds")
-    append_to_csv("time_data.csv", [t1 - t0, "Hashing", game_parameters['size_x'],
-                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
 
-    print("Preparing states")
-    t0 = time.time()
-    states_dict = [{list_elem['board_hash']: hash_index
-                    for hash_index, list_elem in enumerate(states[0])},
-                   {list_elem['board_hash']: hash_index
-                    for hash_index, list_elem in enumerate(states[1])}]
-
-    states = [[{"id": row['id'],
-                "possible_next_states": [{"board_hash": next_state['board_hash'], "move": next_state['move']}
-                                         for next_state in row['board']['next_states']]} for row in state1],
-              [{"id": row['id'],
-                "possible_next_states": [{"board_hash": next_state['board_hash'], "move": next_state['move']}
-                                         for next_state in row['board']['next_states']]} for row in state2]
-              ]
-
-    """
-    number_of_processes = process_number(game_parameters['process_percent'])
-    work_list1 = [np.array(states[0][i::number_of_processes], dtype=dict) for i in range(0, number_of_processes)]
-    work_list2 = [np.array(states[1][i::number_of_processes], dtype=dict) for i in range(0, number_of_processes)]
-    generate_work_files(work_list1, states[1], game_parameters, number_of_processes, 1)
-    generate_work_files(work_list2, states[0], game_parameters, number_of_processes, 2)
-    state_table = load_files(game_parameters, number_of_processes)
-    """
-    state_table = [[test_next_state(row, states[1], game_parameters, states_dict[1]) for row in states[0]],
-                   [test_next_state(row, states[0], game_parameters, states_dict[0]) for row in states[1]]]
-    t1 = time.time()
-    print(str(t1 - t0) + " seconds")
-    append_to_csv("time_data.csv", [t1 - t0, "PreparingStates", game_parameters['size_x'],
-                                    game_parameters['size_y'], game_parameters['min_to_win'], "no"])
-    """
-    possible_next_states = [ {"board": return_game_board, "moves_board": return_moves_board,
-            "move": move, "add_pos": {"pos_x": move, "pos_y": return_moves_board[0][move] - 1},
-            "move_number": how_many_moves, "who_moved": which_player}]
-    
-    list_to_append[how_many_moves].append({"state": game_board, "prizes": prizes,
-                                               "next_states": possible_next_states,
-                                               "who_moved": which_player})
-    """
-    return {"States": state_table, "Q-Tables": q_table,
-            "Prizes": prizes, "Boards": boards}
-
-
-def generate_work_files(boards: List[np.array], state: List[Dict], game_parameters: Dict,
-                        number_of_processes: int, which_player: int) -> None:
-    data_manager = mp.Manager()
-    state_dict = data_manager.dict({list_elem['board_hash']: hash_index
-                                    for hash_index, list_elem in enumerate(state)})
-    processes = []
-    for i in range(0, number_of_processes):
-        process = mp.Process(target=create_work_file, args=(boards[i], state, game_parameters, i, which_player))
-        processes.append(process)
-        process.start()
-
-    for i in range(0, number_of_processes):
-        processes[i].join()
-
-
-def load_files(game_parameters: Dict, number_of_processes: int) -> List[List[int]]:
-    states = [[], []]
-    for i in range(1, 3):
-        work_states = []
-        for j in range(0, number_of_processes):
-            work_states.append(load_work_file(game_parameters, j, i))
-            file_name = str(i) + "_" + str(j) + ".json"
-            path = os.path.join(game_parameters['folder_name'], file_name)
-            os.remove(path)
-        for j in range(0, len(work_states[0])):
-            for k in range(0, number_of_processes):
-                if j < len(work_states[k]):
-                    states[i - 1].append(work_states[k][j])
-    return states
-
-
-def create_work_file(boards_to_check: np.array, state: List[Dict], game_parameters: Dict,
-                     which_process: int, which_player: int) -> None:
-    work_list = [{"board": state[i]['board'],
-                  "hash": hash(state[i]['board'].tobytes()),
-                  "id": state[i]['id']} for i in range(0, len(state))]
-    work_list = [return_next_state(board, work_list, game_parameters)
-                 for board in boards_to_check]
-    file_name = str(which_player) + "_" + str(which_process) + ".json"
-    path = os.path.join(game_parameters['folder_name'], file_name)
-    file = open(path, "w")
-    json.dump(work_list, file)
-
-
-def load_work_file(game_parameters: Dict, which_process: int, which_player: int) -> List[int]:
-    file_name = str(which_player) + "_" + str(which_process) + ".json"
-    path = os.path.join(game_parameters['folder_name'], file_name)
-    with open(path, "r") as file:
-        to_return = json.load(file)
-    # print(to_return)
-    return to_return
-
-
-def test_next_state(board: Dict, state: List[Dict], game_parameters: Dict, state_indexes: Dict) -> List[int]:
-    states = [test_return_index_of_state(board, state, i, state_indexes)
-              for i in range(0, game_parameters['size_x'])]
-    return states
-
-
-def test_return_index_of_state(board: Dict, state: List[Dict], played_move: int, state_indexes: Dict) -> int:
-    work_list = [row for row in board['possible_next_states'] if row['move'] == played_move]
-    if len(work_list) == 0:
-        return -1
-    else:
-        return state[state_indexes[work_list[0]['board_hash']]]['id']
+def return_path(file_name: str, game_parameters: Dict = None) -> str:
+    if game_parameters is not None:
+        return os.path.join(game_parameters['folder_name'], file_name)
+    return file_name
 
 
-def return_next_state(board: Dict, state: List[Dict], game_parameters: Dict) -> List[int]:
+def is_json_file(file_name: str) -> bool:
     """
-    function, which is used for searching boards in list of boards
-    :param board: for which map of game are you searching, size_x x size_y
-    :param state: list of states of the opponent
-    :param game_parameters: parameters of the game
-    :return: list of indexes of states of the opponent
+    :param file_name: name of the file with tables
+    :return: are tables saved as json file (True) or as directory of .npy files (False)
     """
+    return file_name.endswith(".json")
+
 
+def save_tables(tables: Dict, file_name: str, game_parameters: Dict, mode: int = 0) -> None:
     """
-    states = [-1 for i in range(0, game_parameters['size_x'])]
-    
-    for next_state in board[1]['next_states']:
-        for i in range(0, len(state)):
-            if np.array_equal(next_state['board'], state[i]['state']):
-                states[next_state['move']] = i
-    return states
+    save tables to json file, or to directory of .npy files, if file_name does not end with .json
+    :param game_parameters:
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param file_name: name of the file
+    :param mode: does dict contain tables of both players (0) or one (any other int)
+    :return:
     """
-    states = [return_index_of_state(board, state, i)
-              for i in range(0, game_parameters['size_x'])]
-    return states
+    path = return_path(file_name, game_parameters)
+    if not is_json_file(file_name):
+        save_tables_binary(tables, path, mode)
+        return
+    with open(path, "w") as file:
+        json.dump(convert_dict_write(tables, mode), file)
 
 
-def return_index_of_state(board: Dict, state: List[Dict], played_move: int) -> int:
+def read_tables(file_name: str, game_parameters: Dict = None, mode: int = 0,
+                columns: List[str] = None, mmap_mode: str = None) -> Dict:
     """
-    :param board:
-    :param state:
-    :param played_move:
-    :return:
-    """
-    work_list = [row for row in board['possible_next_states'] if row['move'] == played_move]
-    if len(work_list) == 0:
-        return -1
+    loads tables do dict
+    :param game_parameters:
+    :param file_name: name of the json file or directory, where table/tables are located
+    :param mode: does file contain tables of both players (0) or one (any other int)
+    :param columns: which tables to load, all of them if None - only for directories
+    :param mmap_mode: mmap_mode of np.load, e.g. "r" - arrays are not read, but mapped to memory,
+    so processes, which read the same tables, share pages - only for directories
+    :return: dict of tables, 'Terminals', 'Winners' and 'Draws' are added, if they were not saved
+    and game_parameters are given
+    """
+    path = return_path(file_name, game_parameters)
+    if not is_json_file(file_name):
+        tables = read_tables_binary(path, mode, columns, mmap_mode)
     else:
-        hash_id = hash(work_list[0]['board'].tobytes())
-        work_list = [row for row in state if row['hash'] == hash_id]
-        return work_list[0]['id']
+        with open(path, "r") as file:
+            tables = convert_dict_read(json.load(file), mode)
+    if game_parameters is not None and (columns is None or 'Terminals' in columns):
+        add_ending_flags(tables, game_parameters, mode)
+    return tables
 
 
-def return_all_states(all_dicts: List[List[Dict]]) -> List[Dict]:
+def save_tables_binary(tables: Dict, path: str, mode: int = 0) -> None:
+    """
+    saves every table of every player as .npy file of fixed type, other values of the dict are saved
+    in manifest.json, which is written as the last one - every file is written to a temporary file and moved
+    in place of the old one, so tables read from the same directory with mmap_mode can be saved
+    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
+    :param path: path of the directory
+    :param mode: does dict contain tables of both players (0) or one (any other int)
+    :return:
     """
-    function which returns all possible states in form list[dict]
-    :param all_dicts: all states
+    if not os.path.exists(path):
+        os.makedirs(path)
+    manifest = {"version": TABLES_VERSION, "mode": mode, "columns": {}, "values": {}}
+    for key in tables:
+        if key not in COLUMN_TYPES:
+            manifest['values'][key] = np.asarray(tables[key]).tolist()
+            continue
+        seats = [tables[key][0], tables[key][1]] if mode == 0 else [tables[key]]
+        shapes = []
+        for i in range(0, len(seats)):
+            array = np.asarray(seats[i], dtype=COLUMN_TYPES[key])
+            replace_file(os.path.join(path, column_file_name(key, i, mode)), lambda file: np.save(file, array))
+            shapes.append(list(array.shape))
+        manifest['columns'][key] = {"dtype": np.dtype(COLUMN_TYPES[key]).name, "shapes": shapes}
+    replace_file(os.path.join(path, MANIFEST_NAME), lambda file: file.write(json.dumps(manifest).encode()))
+
+
+def replace_file(path: str, write: Callable) -> None:
+    """
+    old file stays untouched, until the new one is written, arrays mapped to the old file are still valid
+    :param path: path of the file
+    :param write: function, which writes the content to the opened binary file
     :return:
     """
-    return_list = []
-    for boards in all_dicts:
-        return_list += boards
-    return return_list
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        write(file)
+    os.replace(temporary_path, path)
 
 
-def save_tables(tables: Dict, file_name: str, game_parameters: Dict, mode: int = 0) -> None:
+def read_tables_binary(path: str, mode: int = 0, columns: List[str] = None, mmap_mode: str = None) -> Dict:
     """
-    save tables to json file
-    :param game_parameters:
-    :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
-    :param file_name: name of the file
-    :param mode: does dict contain tables of both players (0) or one (any other int)
-    :return:
+    :param path: path of the directory saved by save_tables_binary
+    :param mode: does directory contain tables of both players (0) or one (any other int)
+    :param columns: which tables to load, all of them if None
+    :param mmap_mode: mmap_mode of np.load
+    :return: dict of tables
     """
-    path = os.path.join(game_parameters['folder_name'], file_name)
-    with open(path, "w") as file:
-        json.dump(convert_dict_write(tables, mode), file)
+    with open(os.path.join(path, MANIFEST_NAME), "r") as file:
+        manifest = json.load(file)
+    if (manifest['mode'] == 0) != (mode == 0):
+        raise ValueError("Tables in " + path + " were saved with mode " + str(manifest['mode']))
+    tables = {}
+    for key in manifest['columns']:
+        if columns is not None and key not in columns:
+            continue
+        seats = [np.load(os.path.join(path, column_file_name(key, i, mode)), mmap_mode=mmap_mode)
+                 for i in range(0, len(manifest['columns'][key]['shapes']))]
+        tables[key] = seats if mode == 0 else seats[0]
+    for key in manifest['values']:
+        if columns is None or key in columns:
+            tables[key] = manifest['values'][key]
+    if columns is None or 'Legal-Moves' in columns:
+        add_legal_moves(tables, mode)
+    return tables
 
 
-def read_tables(file_name: str, game_parameters: Dict = None, mode: int = 0) -> Dict:
+def column_file_name(key: str, which_player: int, mode: int = 0) -> str:
+    if mode == 0:
+        return key + "_" + str(which_player + 1) + ".npy"
+    return key + ".npy"
+
+
+def convert_tables(file_name: str, game_parameters: Dict = None, mode: int = 0) -> str:
     """
-    loads tables do dict
-    :param game_parameters:
-    :param file_name: name of the json file, where table/tables are located
+    converts json file with tables to directory of .npy files
+    :param file_name: name of the json file
+    :param game_parameters: parameters of the game
     :param mode: does file contain tables of both players (0) or one (any other int)
-    :return: dict of tables
+    :return: name of the directory
     """
-    if game_parameters is not None:
-        path = os.path.join(game_parameters['folder_name'], file_name)
-        with open(path, "r") as file:
-            to_return = json.load(file)
-    else:
-        with open(file_name, "r") as file:
-            to_return = json.load(file)
-    return convert_dict_read(to_return, mode)
+    new_name = file_name[:-len(".json")] + TABLES_SUFFIX
+    save_tables(read_tables(file_name, game_parameters, mode), new_name, game_parameters, mode)
+    return new_name
+
+
+def rebuild_prizes(file_name: str, game_parameters: Dict) -> None:
+    """
+    replaces 'Prizes' of saved tables with prizes for current weights of rewards computed from 'Features',
+    in directories of .npy files only files of prizes are written again, chunk by chunk
+    :param file_name: name of the file with tables
+    :param game_parameters: parameters of the game
+    :return:
+    """
+    if is_json_file(file_name):
+        tables = read_tables(file_name, game_parameters)
+        if 'Features' not in tables:
+            raise ValueError("Tables in " + file_name + " were generated without features")
+        tables['Prizes'] = [prepare_prizes_from_features(tables['Features'][i], tables['States'][i], game_parameters)
+                            for i in range(0, 2)]
+        save_tables(tables, file_name, game_parameters)
+        return
+    path = return_path(file_name, game_parameters)
+    tables = read_tables_binary(path, columns=["States", "Features"], mmap_mode="r")
+    if 'Features' not in tables:
+        raise ValueError("Tables in " + file_name + " were generated without features")
+    chunk = 2 ** 20
+    for i in range(0, 2):
+        prizes = np.lib.format.open_memmap(os.path.join(path, column_file_name("Prizes", i)), mode="w+",
+                                           dtype=COLUMN_TYPES['Prizes'], shape=tables['States'][i].shape)
+        for start in range(0, len(prizes), chunk):
+            prizes[start:start + chunk] = prepare_prizes_from_features(tables['Features'][i][start:start + chunk],
+                                                                       tables['States'][i][start:start + chunk],
+                                                                       game_parameters)
+        prizes.flush()
 
 
 def convert_dict_write(tables: Dict, mode: int = 0) -> Dict:
@@ -416,32 +519,29 @@ def convert_dict_write(tables: Dict, mode: int = 0) -> Dict:
     :param mode: 0 for both players, any other int for only one
     :return: dict, which can be saved
     """
-    if mode == 0:
-        tables['Q-Tables'][0] = tables['Q-Tables'][0].tolist()
-        tables['Q-Tables'][1] = tables['Q-Tables'][1].tolist()
-        tables['Boards'][0] = [tables['Boards'][0][i].tolist() for i in range(0, len(tables['Boards'][0]))]
-        tables['Boards'][1] = [tables['Boards'][1][i].tolist() for i in range(0, len(tables['Boards'][1]))]
-    else:
-        tables['Q-Tables'] = tables['Q-Tables'].tolist()
-        tables['Boards'] = [tables['Boards'][i].tolist() for i in range(0, len(tables['Boards']))]
+    for key in COLUMN_TYPES:
+        if key in tables:
+            if mode == 0:
+                tables[key] = [np.asarray(tables[key][0]).tolist(), np.asarray(tables[key][1]).tolist()]
+            else:
+                tables[key] = np.asarray(tables[key]).tolist()
     return tables
 
 
 def convert_dict_read(tables: Dict, mode: int = 0) -> Dict:
     """
-    function to convert dict from json file to dict which uses numpy arrays and lists
+    function to convert dict from json file to dict which uses numpy arrays of types from COLUMN_TYPES
     :param tables: dict, which contains q-tables, prizes, how to change states, and how the boards looks like
     :param mode: 0 for both players, any other int for only one
     :return: dict, which can be used for learning and playing
     """
-    if mode == 0:
-        tables['Q-Tables'][0] = np.array(tables['Q-Tables'][0], dtype=float)
-        tables['Q-Tables'][1] = np.array(tables['Q-Tables'][1], dtype=float)
-        tables['Boards'][0] = [np.array(tables['Boards'][0][i], dtype=int) for i in range(0, len(tables['Boards'][0]))]
-        tables['Boards'][1] = [np.array(tables['Boards'][1][i], dtype=int) for i in range(0, len(tables['Boards'][1]))]
-    else:
-        tables['Q-Tables'] = np.array(tables['Q-Tables'], dtype=float)
-        tables['Boards'] = [np.array(tables['Boards'][i], dtype=int) for i in range(0, len(tables['Boards']))]
+    for key, dtype in COLUMN_TYPES.items():
+        if key in tables:
+            if mode == 0:
+                tables[key] = [np.array(tables[key][0], dtype=dtype), np.array(tables[key][1], dtype=dtype)]
+            else:
+                tables[key] = np.array(tables[key], dtype=dtype)
+    add_legal_moves(tables, mode)
     return tables
 
 
@@ -451,6 +551,8 @@ def save_and_prepare_tables(game_parameters: Dict) -> None:
     :param game_parameters: parameters of the game
     :return:
     """
+    if game_parameters.get('canonical', 0):
+        raise ValueError("Tables without mirrored states are prepared only by generatorSystem")
     list_of_all_dicts = return_list_of_lists(game_parameters['max_n_moves'] + 1)
     moves_table = np.zeros((2, game_parameters['size_x']), dtype=int)
     for i in range(0, game_parameters['size_x']):
@@ -468,8 +570,7 @@ def save_and_prepare_tables(game_parameters: Dict) -> None:
 
     print("Conversion")
     t0 = time.time()
-    all_states = return_all_states(list_of_all_dicts)
-    tables = prepare_tables(all_states, game_parameters)
+    tables = prepare_tables(list_of_all_dicts, game_parameters)
     t1 = time.time()
     print(str(t1 - t0) + " seconds")
     append_to_csv("time_data.csv", [t1 - t0, "GeneratedDataConversion", game_parameters['size_x'],